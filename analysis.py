@@ -1,6 +1,12 @@
-import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-import seaborn as sns
+
+import common
+
+# Columns used by this analysis (raw GTD names)
+NEEDED_COLUMNS = ["iyear", "country_txt", "region_txt"]
 
 
 def load_data(file_path):
@@ -8,7 +14,7 @@ def load_data(file_path):
     Loads the terrorism data from an Excel file.
     """
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
@@ -21,33 +27,41 @@ def plot_attacks_by_region(df):
     Plots the number of terrorist attacks by region.
     """
     plt.figure(figsize=(12, 8))
-    sns.countplot(y="Region", data=df, order=df["Region"].value_counts().index)
+    counts = common.count_values(df["Region"])
+    # Largest region on top, matching seaborn's countplot ordering
+    plt.barh(counts.index.astype(str)[::-1], counts.values[::-1])
     plt.title("Number of Terrorist Attacks by Region")
     plt.xlabel("Number of Attacks")
     plt.ylabel("Region")
     plt.tight_layout()
     plt.savefig("attacks_by_region.png")
-    plt.show()
+    plt.close()
 
 
 def plot_attacks_over_time_comparison(df):
     """
     Plots the number of terrorist attacks over time for the world, Central Asia, and Kazakhstan.
     """
-    world_attacks = df.groupby("Year").size()
-
-    central_asia_df = df[df["Region"] == "Central Asia"]
-    central_asia_attacks = central_asia_df.groupby("Year").size()
-
-    kazakhstan_df = df[df["Country"] == "Kazakhstan"]
-    kazakhstan_attacks = kazakhstan_df.groupby("Year").size()
+    # Count all three series in a single pass over the data
+    yearly_attacks = (
+        df.assign(
+            is_central_asia=df["Region"] == "Central Asia",
+            is_kazakhstan=df["Country"] == "Kazakhstan",
+        )
+        .groupby("Year")
+        .agg(
+            world=("Year", "size"),
+            central_asia=("is_central_asia", "sum"),
+            kazakhstan=("is_kazakhstan", "sum"),
+        )
+    )
 
     plt.figure(figsize=(15, 7))
-    plt.plot(world_attacks.index, world_attacks.values, label="World")
+    plt.plot(yearly_attacks.index, yearly_attacks["world"], label="World")
     plt.plot(
-        central_asia_attacks.index, central_asia_attacks.values, label="Central Asia"
+        yearly_attacks.index, yearly_attacks["central_asia"], label="Central Asia"
     )
-    plt.plot(kazakhstan_attacks.index, kazakhstan_attacks.values, label="Kazakhstan")
+    plt.plot(yearly_attacks.index, yearly_attacks["kazakhstan"], label="Kazakhstan")
 
     plt.title("Number of Terrorist Attacks Over Time")
     plt.xlabel("Year")
@@ -55,39 +69,22 @@ def plot_attacks_over_time_comparison(df):
     plt.legend()
     plt.grid(True)
     plt.savefig("attachments/attacks_over_time_comparison.png")
-    plt.show()
+    plt.close()
 
 
-def run_analysis():
+def run_analysis(gtd_df=None):
     # For development, use the smaller dataset
     # file_to_use = 'gtd-mini.xlsx'
     # For final analysis, you would switch to 'gtd.xlsx'
     file_to_use = "gtd.xlsx"
 
-    gtd_df = load_data(file_to_use)
+    # A frame passed in by the caller is already loaded and renamed
+    if gtd_df is None:
+        gtd_df = load_data(file_to_use)
 
     if gtd_df is not None:
         # Rename columns for easier access
-        gtd_df.rename(
-            columns={
-                "iyear": "Year",
-                "imonth": "Month",
-                "iday": "Day",
-                "country_txt": "Country",
-                "provstate": "state",
-                "region_txt": "Region",
-                "attacktype1_txt": "AttackType",
-                "target1": "Target",
-                "nkill": "Killed",
-                "nwound": "Wounded",
-                "summary": "Summary",
-                "gname": "Group",
-                "targtype1_txt": "Target_type",
-                "weaptype1_txt": "Weapon_type",
-                "motive": "Motive",
-            },
-            inplace=True,
-        )
+        gtd_df = gtd_df.rename(columns=common.RENAME_MAP)
 
         # The user wants to focus on continents, but the dataset has 'region'.
         # Let's start by analyzing the regions first.
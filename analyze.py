@@ -1,28 +1,37 @@
-import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
-def run_analysis():
+import common
+
+# Столбцы, которые использует анализ (очищенные названия)
+NEEDED_COLUMNS = ["Year", "Country", "Region", "AttackType", "Target_type"]
+
+def run_analysis(df=None):
     # --- КОНФИГУРАЦИЯ ---
     # Установите True для использования полного набора данных, False для использования мини-набора данных для разработки
     USE_FULL_DATASET = False
+    # Установите True, чтобы вывести df.info() и df.describe() по всему набору данных
+    VERBOSE = False
     # -------------------
 
-    # Определяем, какой файл загружать
-    if USE_FULL_DATASET:
-        file_to_load = "gtd.xlsx"
-        print("Попытка загрузить полный набор данных...")
-    else:
-        file_to_load = "gtd-mini.xlsx"
-        print("Попытка загрузить мини-набор данных для разработки...")
-
+    # Загрузка набора данных (main.py передает уже загруженный общий набор)
+    if df is None:
+        # Определяем, какой файл загружать
+        if USE_FULL_DATASET:
+            file_to_load = "gtd.xlsx"
+            print("Попытка загрузить полный набор данных...")
+        else:
+            file_to_load = "gtd-mini.parquet"
+            print("Попытка загрузить мини-набор данных для разработки...")
 
-    # Загрузка набора данных
-    try:
-        df = pd.read_excel(file_to_load)
-        print(f"Набор данных успешно загружен из {file_to_load}.")
-    except FileNotFoundError:
-        print(f"Ошибка: Файл '{file_to_load}' не найден. Убедитесь, что он находится в правильном каталоге.")
-        return
+        try:
+            df = common.load_clean_data(file_to_load, columns=NEEDED_COLUMNS)
+            print(f"Набор данных успешно загружен из {file_to_load}.")
+        except FileNotFoundError:
+            print(f"Ошибка: Файл '{file_to_load}' не найден. Убедитесь, что он находится в правильном каталоге.")
+            return
 
     # --- АНАЛИЗ ДАННЫХ ---
 
@@ -30,15 +39,16 @@ def run_analysis():
     print("\n--- 1. Обзор данных ---")
     print("Первые 5 строк:")
     print(df.head())
-    print("\nИнформация о наборе данных:")
-    df.info()
-    print("\nОсновные статистические данные:")
-    print(df.describe())
+    if VERBOSE:
+        print("\nИнформация о наборе данных:")
+        df.info()
+        print("\nОсновные статистические данные:")
+        print(df.describe())
 
     # 2. Анализ атак по времени
     print("\n--- 2. Анализ атак по времени ---")
     plt.figure(figsize=(15, 7))
-    df['iyear'].value_counts().sort_index().plot(kind='line')
+    df['Year'].value_counts(sort=False).sort_index().plot(kind='line')
     plt.title('Количество терактов по годам (в мире)')
     plt.xlabel('Год')
     plt.ylabel('Количество атак')
@@ -51,7 +61,7 @@ def run_analysis():
     # 3. Анализ по регионам
     print("\n--- 3. Анализ по регионам ---")
     plt.figure(figsize=(12, 8))
-    df['region_txt'].value_counts().plot(kind='barh')
+    common.count_values(df['Region']).plot(kind='barh')
     plt.title('Количество терактов по регионам')
     plt.xlabel('Количество атак')
     plt.ylabel('Регион')
@@ -64,7 +74,7 @@ def run_analysis():
     # 4. Анализ типов атак
     print("\n--- 4. Анализ типов атак ---")
     plt.figure(figsize=(12, 6))
-    df['attacktype1_txt'].value_counts().plot(kind='bar')
+    common.count_values(df['AttackType']).plot(kind='bar')
     plt.title('Самые распространенные типы атак')
     plt.xlabel('Тип атаки')
     plt.ylabel('Количество')
@@ -78,7 +88,7 @@ def run_analysis():
     # 5. Анализ целей атак
     print("\n--- 5. Анализ целей атак ---")
     plt.figure(figsize=(12, 8))
-    df['targtype1_txt'].value_counts().plot(kind='barh')
+    common.count_values(df['Target_type']).plot(kind='barh')
     plt.title('Самые частые цели атак')
     plt.xlabel('Количество атак')
     plt.ylabel('Тип цели')
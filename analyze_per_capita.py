@@ -1,53 +1,84 @@
+import json
 import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 from countryinfo import CountryInfo
 import time
 
-def run_analysis():
-    print("Скрипт запущен")
-    start_time = time.time()
+import common
 
-    # Загрузка данных
+# Columns used by this analysis
+NEEDED_COLUMNS = ["Country", "Region"]
+# Файл с уже полученными данными о населении
+POPULATION_CACHE = "population_cache.json"
+
+def load_population_data(countries, cache_path=POPULATION_CACHE):
+    """
+    Возвращает словарь {страна: население}, запрашивая CountryInfo только
+    для стран, которых еще нет в кэше.
+    """
     try:
-        df = pd.read_excel("gtd.xlsx")
-        print(f"Данные загружены за {time.time() - start_time:.2f} секунд")
+        with open(cache_path, encoding="utf-8") as f:
+            population_data = json.load(f)
     except FileNotFoundError:
-        print("Файл gtd.xlsx не найден.")
-        return
-
-    # Удаление строк с отсутствующими значениями в столбце 'country_txt'
-    df.dropna(subset=["country_txt"], inplace=True)
-    print("Строки без названия страны удалены")
+        population_data = {}
 
-    # Получение данных о населении
-    unique_countries = df["country_txt"].unique()
-    print(f"Найдено {len(unique_countries)} уникальных стран")
-    population_data = {}
+    missing_countries = [c for c in countries if c not in population_data]
+    if missing_countries:
+        print(f"Запрос населения для {len(missing_countries)} стран...")
     countries_processed = 0
-    for country in unique_countries:
+    for country in missing_countries:
         try:
             population_data[country] = CountryInfo(country).population()
         except (KeyError, ValueError):
             population_data[country] = None
         countries_processed += 1
         if countries_processed % 20 == 0:
-            print(f"Обработано {countries_processed}/{len(unique_countries)} стран...")
+            print(f"Обработано {countries_processed}/{len(missing_countries)} стран...")
 
-    print(f"Данные о населении собраны за {time.time() - start_time:.2f} секунд")
+    if missing_countries:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(population_data, f, ensure_ascii=False, indent=2)
+
+    return {country: population_data[country] for country in countries}
 
-    df["population"] = df["country_txt"].map(population_data)
+def run_analysis(df=None):
+    print("Скрипт запущен")
+    start_time = time.time()
+
+    # Загрузка данных (main.py передает уже загруженный общий набор)
+    if df is None:
+        try:
+            df = common.load_clean_data("gtd.xlsx", columns=NEEDED_COLUMNS)
+            print(f"Данные загружены за {time.time() - start_time:.2f} секунд")
+        except FileNotFoundError:
+            print("Файл gtd.xlsx не найден.")
+            return
+
+    # Удаление строк с отсутствующими значениями в столбце 'Country'
+    df = df.dropna(subset=["Country"])
+    print("Строки без названия страны удалены")
+
+    # Получение данных о населении
+    unique_countries = df["Country"].unique()
+    print(f"Найдено {len(unique_countries)} уникальных стран")
+    population_data = load_population_data(unique_countries)
+
+    print(f"Данные о населении собраны за {time.time() - start_time:.2f} секунд")
 
-    # Удаление строк, где не удалось получить данные о населении
-    df.dropna(subset=["population"], inplace=True)
-    print("Строки без данных о населении удалены")
+    # Население по странам; страны без данных исключаются
+    population_by_country = pd.Series(population_data, dtype=float).dropna()
+    print("Страны без данных о населении исключены")
 
     # Расчет количества атак на 1 миллион человек
-    # Группируем по странам и считаем количество атак
-    attacks_by_country = df.groupby("country_txt").size()
-    # Получаем население для каждой страны
-    population_by_country = df.groupby("country_txt")["population"].first()
-    # Рассчитываем атаки на миллион
-    attacks_per_million = (attacks_by_country / population_by_country) * 1_000_000
+    # Считаем количество атак по странам (без привязки населения к каждой строке)
+    attacks_by_country = common.count_values(df["Country"])
+    # Рассчитываем атаки на миллион только для стран с известным населением
+    attacks_per_million = (
+        attacks_by_country.reindex(population_by_country.index) / population_by_country
+    ) * 1_000_000
     attacks_per_million = attacks_per_million.sort_values(ascending=False)
 
     print(f"Расчеты завершены за {time.time() - start_time:.2f} секунд")
@@ -61,12 +92,12 @@ def run_analysis():
     plt.xticks(rotation=45, ha="right")
     plt.tight_layout()
     plt.savefig("attacks_per_capita.png")
-    plt.show()
+    plt.close()
 
     print("График 'attacks_per_capita.png' успешно сохранен.")
 
     # Анализ для Центральной Азии
-    central_asia_countries = df[df["region_txt"] == "Central Asia"]["country_txt"].unique()
+    central_asia_countries = df[df["Region"] == "Central Asia"]["Country"].unique()
     central_asia_attacks = attacks_per_million.loc[
         attacks_per_million.index.isin(central_asia_countries)
     ]
@@ -88,7 +119,7 @@ def run_analysis():
     plt.xticks(rotation=45, ha="right")
     plt.tight_layout()
     plt.savefig("attachments/attacks_per_capita_central_asia.png")
-    plt.show()
+    plt.close()
     print("График 'attacks_per_capita_central_asia.png' успешно сохранен.")
 
     print(f"Скрипт завершен за {time.time() - start_time:.2f} секунд")
@@ -0,0 +1,282 @@
+"""
+Common Data Loading
+Shared helpers for reading the GTD workbook through a Parquet cache.
+"""
+
+import functools
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Copy-on-Write: renames, column selections and filters return frames that
+# share data until one side is written, instead of copying up front. Set
+# here because every script imports common before touching a frame.
+pd.set_option("mode.copy_on_write", True)
+
+# Raw GTD columns read from the workbook; everything else is skipped
+GTD_COLUMNS = [
+    "iyear",
+    "imonth",
+    "iday",
+    "country_txt",
+    "provstate",
+    "region_txt",
+    "attacktype1_txt",
+    "target1",
+    "nkill",
+    "nwound",
+    "success",
+    "gname",
+    "targtype1_txt",
+    "weaptype1_txt",
+    "city",
+    "summary",
+    "motive",
+]
+
+GTD_DTYPES = {
+    "country_txt": "category",
+    "region_txt": "category",
+    "attacktype1_txt": "category",
+    "targtype1_txt": "category",
+    "weaptype1_txt": "category",
+    "gname": "category",
+    "city": "category",
+    "iyear": "int16",
+    "imonth": "int8",
+    "iday": "int8",
+}
+
+# Raw numeric columns whose cells can hold text, e.g. "Unknown" for nkill
+GTD_NUMERIC_COLUMNS = ["nkill", "nwound", "success"]
+
+# Consistent short column names used across the analysis scripts
+RENAME_MAP = {
+    "iyear": "Year",
+    "imonth": "Month",
+    "iday": "Day",
+    "country_txt": "Country",
+    "provstate": "State",
+    "region_txt": "Region",
+    "city": "City",
+    "attacktype1_txt": "AttackType",
+    "target1": "Target",
+    "nkill": "Killed",
+    "nwound": "Wounded",
+    "success": "Success",
+    "gname": "Group",
+    "targtype1_txt": "Target_type",
+    "weaptype1_txt": "Weapon_type",
+    "summary": "Summary",
+    "motive": "Motive",
+}
+
+CATEGORY_COLUMNS = [
+    "Country",
+    "Region",
+    "City",
+    "AttackType",
+    "Group",
+    "Target_type",
+    "Weapon_type",
+]
+
+# Columns of the cleaned cache: the renamed raw columns plus derived ones
+CLEAN_COLUMNS = [*RENAME_MAP.values(), "Casualties"]
+
+
+def is_stale(target, source, columns=None):
+    """
+    Returns True if target is missing, older than an existing source file,
+    or lacks any of the requested columns.
+    """
+    if not target.exists():
+        return True
+    if source.exists() and source.stat().st_mtime > target.stat().st_mtime:
+        return True
+    if columns is None:
+        return False
+    return not set(columns) <= set(pq.read_schema(target).names)
+
+
+def write_parquet(df, path):
+    """Writes a DataFrame to a zstd-compressed Parquet file."""
+    # Text columns can still hold the odd number, which Arrow cannot store
+    # alongside strings; numeric columns are coerced by read_workbook
+    object_columns = [col for col in df.columns if df[col].dtype == object]
+    df = df.astype(dict.fromkeys(object_columns, "string"))
+    df.to_parquet(path, engine="pyarrow", compression="zstd")
+
+
+@functools.lru_cache(maxsize=8)
+def _read_parquet(path, columns, mtime_ns):
+    # mtime_ns is part of the key so a rebuilt cache file is read again
+    columns = None if columns is None else list(columns)
+    return pd.read_parquet(path, columns=columns, engine="pyarrow")
+
+
+def read_parquet(path, columns=None):
+    """
+    Reads columns of a Parquet file, reusing the frame of an earlier read of
+    the same file and columns in this process.
+
+    The frame is shared between callers, so they must not modify it in place.
+    """
+    path = Path(path)
+    columns = None if columns is None else tuple(columns)
+    return _read_parquet(path, columns, path.stat().st_mtime_ns)
+
+
+def read_workbook(file_path, nrows=None):
+    """
+    Reads the needed GTD columns from an Excel workbook.
+
+    Text cells in the numeric columns are read as missing, so the columns
+    are cached as numbers rather than as strings.
+    """
+    df = pd.read_excel(
+        file_path,
+        engine="calamine",
+        usecols=GTD_COLUMNS,
+        dtype=GTD_DTYPES,
+        nrows=nrows,
+    )
+    for col in GTD_NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def load_data(file_path, columns=None):
+    """
+    Loads the terrorism data, caching the Excel workbook as a sibling Parquet file.
+
+    The workbook is parsed only when the cache is missing, older than it or
+    missing a requested column; later runs read just the requested columns
+    from the cache. A .parquet path is read directly. Repeated loads in the
+    same process reuse the frame read the first time.
+    """
+    source = Path(file_path)
+    cache_path = source.with_suffix(".parquet")
+    if cache_path != source and is_stale(cache_path, source, columns):
+        df = read_workbook(source)
+        write_parquet(df, cache_path)
+        print(f"Cached {source} as {cache_path}")
+    return read_parquet(cache_path, columns)
+
+
+def prepare_data(df):
+    """
+    Renames columns, fills missing casualty counts, adds their Casualties total
+    and makes text keys categorical.
+    """
+    df = df.rename(columns=RENAME_MAP)
+    for col in ("Killed", "Wounded"):
+        if col in df:
+            # Counts stay far below 2**24, where float32 stops being exact
+            counts = pd.to_numeric(df[col], errors="coerce").fillna(0)
+            df[col] = counts.astype("float32")
+    if "Killed" in df and "Wounded" in df:
+        df["Casualties"] = df["Killed"] + df["Wounded"]
+    for col in CATEGORY_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def load_clean_data(file_path, columns=None):
+    """
+    Loads the prepared terrorism data from a second, cleaned Parquet cache.
+
+    The cleaned cache holds the output of prepare_data and is rebuilt when the
+    workbook or raw cache is newer, so the cleanup runs once rather than on
+    every load. Columns are given by their renamed names; without them the
+    whole prepared frame is loaded, e.g. once in main.py for every script.
+    """
+    source = Path(file_path)
+    clean_path = source.with_suffix(".clean.parquet")
+    expected = columns if columns is not None else CLEAN_COLUMNS
+    if is_stale(clean_path, source, expected) or is_stale(
+        clean_path, source.with_suffix(".parquet")
+    ):
+        df = prepare_data(load_data(file_path, columns=GTD_COLUMNS))
+        write_parquet(df, clean_path)
+    return read_parquet(clean_path, columns)
+
+
+def count_table(df, index, columns, normalize=False):
+    """
+    Counts the rows of each observed (index, columns) pair, like pd.crosstab.
+
+    With normalize=True every row is converted to percentages of its total.
+    """
+    counts = df.groupby([index, columns], observed=True).size().unstack(fill_value=0)
+    if normalize:
+        return counts.div(counts.sum(axis=1), axis=0) * 100
+    return counts
+
+
+def count_values(series):
+    """
+    Counts each value of a categorical Series, most frequent first.
+
+    Matches value_counts on the plain values: counts are listed in order of
+    first appearance before sorting, so ties rank as they did before the
+    column was categorical rather than in category order.
+    """
+    codes = series.cat.codes.to_numpy()
+    codes = codes[codes >= 0]
+    present, first = np.unique(codes, return_index=True)
+    order = present[np.argsort(first)]
+    counts = pd.Series(
+        np.bincount(codes, minlength=len(series.cat.categories))[order],
+        index=pd.Index(series.cat.categories[order], name=series.name),
+        name="count",
+    )
+    # The default sort, as value_counts uses, so ties come out the same way
+    return counts.sort_values(ascending=False)
+
+
+def category_mask(series, values):
+    """
+    Boolean mask of the rows of a categorical Series whose value is in values.
+
+    Compares the integer codes instead of hashing every row's label.
+    """
+    codes = series.cat.categories.get_indexer(values)
+    return np.isin(series.cat.codes.to_numpy(), codes[codes >= 0])
+
+
+def _call(call):
+    function, *args = call
+    return function(*args)
+
+
+def run_parallel(calls):
+    """
+    Runs independent (function, *args) calls in worker processes.
+
+    Functions must be module-level so they can be sent to the workers. When
+    already running inside a worker, or when only one worker would be
+    started, the calls run in order in this process instead.
+    """
+    workers = min(len(calls), os.cpu_count() or 1)
+    # A single spawned worker would only add its start-up cost
+    if workers <= 1 or multiprocessing.parent_process() is not None:
+        return [_call(call) for call in calls]
+    # pyarrow starts threads, so forking the loaded process is unsafe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        return list(executor.map(_call, calls))
+
+
+if __name__ == "__main__":
+    # One-time conversion: python common.py [workbook ...]
+    for workbook in sys.argv[1:] or ["gtd.xlsx"]:
+        load_clean_data(workbook)
+        print(f"Converted {workbook}")
@@ -1,24 +1,23 @@
-import pandas as pd
 import os
 
+import common
+
 
 def create_mini_dataset(input_file, output_file, num_rows=1000):
     """
-    Creates a smaller version of an Excel file.
+    Creates a smaller Parquet version of an Excel file.
 
     Args:
         input_file (str): Path to the input Excel file.
-        output_file (str): Path to the output Excel file.
+        output_file (str): Path to the output Parquet file.
         num_rows (int): Number of rows to include in the smaller file.
     """
     try:
-        df = pd.read_excel(input_file)
+        # Only the first num_rows data rows are parsed, not the whole workbook
+        mini_df = common.read_workbook(input_file, nrows=num_rows)
         print(f"Successfully read {input_file}")
 
-        # The first row is the header, so we take num_rows of data
-        mini_df = df.head(num_rows)
-
-        mini_df.to_excel(output_file, index=False)
+        common.write_parquet(mini_df, output_file)
         print(f"Successfully created {output_file} with {num_rows} rows.")
 
     except FileNotFoundError:
@@ -31,6 +30,6 @@ if __name__ == "__main__":
     # Use absolute paths
     workspace_dir = os.path.dirname(os.path.abspath(__file__))
     input_path = os.path.join(workspace_dir, "gtd.xlsx")
-    output_path = os.path.join(workspace_dir, "gtd-mini.xlsx")
+    output_path = os.path.join(workspace_dir, "gtd-mini.parquet")
 
     create_mini_dataset(input_path, output_path, num_rows=1000)
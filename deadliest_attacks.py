@@ -4,18 +4,35 @@ Analyzes the most lethal terrorist incidents in history and by region.
 """
 
 import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
+import numpy as np
+
+import common
 
 # Configuration
 USE_FULL_DATASET = True
+NEEDED_COLUMNS = [
+    "Year",
+    "Country",
+    "Region",
+    "City",
+    "AttackType",
+    "Target",
+    "Killed",
+    "Wounded",
+    "Group",
+]
 
 
 def load_data():
-    """Loads the terrorism data from Excel file."""
-    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.xlsx"
+    """Loads the cleaned terrorism data (renamed, numeric casualties)."""
+    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.parquet"
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_clean_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
@@ -23,31 +40,17 @@ def load_data():
         return None
 
 
-def prepare_data(df):
-    """Renames columns and prepares data for analysis."""
-    df.rename(
-        columns={
-            "iyear": "Year",
-            "imonth": "Month",
-            "iday": "Day",
-            "country_txt": "Country",
-            "region_txt": "Region",
-            "attacktype1_txt": "AttackType",
-            "target1": "Target",
-            "nkill": "Killed",
-            "nwound": "Wounded",
-            "gname": "Group",
-            "targtype1_txt": "Target_type",
-            "weaptype1_txt": "Weapon_type",
-            "city": "City",
-        },
-        inplace=True,
-    )
-
-    df["Killed"] = pd.to_numeric(df["Killed"], errors="coerce").fillna(0)
-    df["Wounded"] = pd.to_numeric(df["Wounded"], errors="coerce").fillna(0)
-    df["Casualties"] = df["Killed"] + df["Wounded"]
-    return df
+def top_k_positions(values, k):
+    """Returns positions of the k largest values, largest first, without a full sort."""
+    k = min(k, len(values))
+    if k == 0:
+        return np.array([], dtype=np.intp)
+    # argpartition only finds the k-th largest value; which of the rows tied
+    # with it it keeps is arbitrary, so every row at or above it is a candidate
+    threshold = values[np.argpartition(values, len(values) - k)[len(values) - k]]
+    candidates = np.flatnonzero(values >= threshold)
+    # Order by value, breaking ties by original position like nlargest
+    return candidates[np.lexsort((candidates, -values[candidates]))][:k]
 
 
 def analyze_deadliest_attacks(df, top_n=20):
@@ -56,7 +59,8 @@ def analyze_deadliest_attacks(df, top_n=20):
     print(f"TOP {top_n} DEADLIEST TERRORIST ATTACKS IN HISTORY")
     print("=" * 60)
 
-    deadliest = df.nlargest(top_n, "Killed")[
+    top = top_k_positions(df["Killed"].to_numpy(), top_n)
+    deadliest = df.iloc[top][
         [
             "Year",
             "Country",
@@ -69,11 +73,26 @@ def analyze_deadliest_attacks(df, top_n=20):
         ]
     ]
 
-    for i, (_, row) in enumerate(deadliest.iterrows(), 1):
-        print(f"\n{i}. {row['Country']}, {row['City']} ({int(row['Year'])})")
-        print(f"   Group: {row['Group']}")
-        print(f"   Attack Type: {row['AttackType']}")
-        print(f"   Killed: {int(row['Killed'])}, Wounded: {int(row['Wounded'])}")
+    rank = pd.Series(range(1, len(deadliest) + 1), index=deadliest.index)
+    lines = (
+        "\n"
+        + rank.astype(str)
+        + ". "
+        + deadliest["Country"].astype(str)
+        + ", "
+        + deadliest["City"].astype(str)
+        + " ("
+        + deadliest["Year"].astype(int).astype(str)
+        + ")\n   Group: "
+        + deadliest["Group"].astype(str)
+        + "\n   Attack Type: "
+        + deadliest["AttackType"].astype(str)
+        + "\n   Killed: "
+        + deadliest["Killed"].astype(int).astype(str)
+        + ", Wounded: "
+        + deadliest["Wounded"].astype(int).astype(str)
+    )
+    print("\n".join(lines))
 
     return deadliest
 
@@ -81,17 +100,16 @@ def analyze_deadliest_attacks(df, top_n=20):
 def plot_deadliest_by_region(df):
     """Plots average casualties per attack by region."""
     region_stats = (
-        df.groupby("Region")
-        .agg({"Killed": ["sum", "mean"], "Wounded": ["sum", "mean"], "Year": "count"})
+        df.groupby("Region", observed=True)
+        .agg(
+            Total_Killed=("Killed", "sum"),
+            Avg_Killed=("Killed", "mean"),
+            Total_Wounded=("Wounded", "sum"),
+            Avg_Wounded=("Wounded", "mean"),
+            Total_Attacks=("Year", "size"),
+        )
         .round(2)
     )
-    region_stats.columns = [
-        "Total_Killed",
-        "Avg_Killed",
-        "Total_Wounded",
-        "Avg_Wounded",
-        "Total_Attacks",
-    ]
     region_stats["Avg_Casualties"] = (
         region_stats["Avg_Killed"] + region_stats["Avg_Wounded"]
     )
@@ -132,7 +150,7 @@ def plot_deadliest_by_region(df):
 
     plt.tight_layout()
     plt.savefig("deadliest_by_region.png", dpi=150)
-    plt.show()
+    plt.close()
     print("\nSaved: deadliest_by_region.png")
 
     return region_stats
@@ -143,7 +161,7 @@ def plot_deadliest_groups(df, top_n=15):
     # Exclude Unknown
     df_known = df[df["Group"] != "Unknown"]
 
-    group_stats = df_known.groupby("Group").agg(
+    group_stats = df_known.groupby("Group", observed=True).agg(
         {"Killed": "sum", "Wounded": "sum", "Year": "count"}
     )
     group_stats.columns = ["Total_Killed", "Total_Wounded", "Total_Attacks"]
@@ -174,17 +192,25 @@ def plot_deadliest_groups(df, top_n=15):
     plt.gca().invert_yaxis()
     plt.tight_layout()
     plt.savefig("attachments/deadliest_groups.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: deadliest_groups.png")
 
     print(f"\n{'=' * 60}")
     print(f"TOP {top_n} DEADLIEST TERRORIST GROUPS")
     print("=" * 60)
-    for i, (group, row) in enumerate(group_stats.iterrows(), 1):
-        print(f"{i:2}. {group}")
-        print(
-            f"    Attacks: {int(row['Total_Attacks']):,} | Killed: {int(row['Total_Killed']):,} | Wounded: {int(row['Total_Wounded']):,}"
-        )
+    rank = pd.Series(range(1, len(group_stats) + 1), index=group_stats.index)
+    lines = (
+        rank.astype(str).str.rjust(2)
+        + ". "
+        + group_stats.index.astype(str).to_series(index=group_stats.index)
+        + "\n    Attacks: "
+        + group_stats["Total_Attacks"].astype(int).map("{:,}".format)
+        + " | Killed: "
+        + group_stats["Total_Killed"].astype(int).map("{:,}".format)
+        + " | Wounded: "
+        + group_stats["Total_Wounded"].astype(int).map("{:,}".format)
+    )
+    print("\n".join(lines))
 
 
 def analyze_lethality_trends(df):
@@ -249,18 +275,17 @@ def analyze_lethality_trends(df):
 
     plt.tight_layout()
     plt.savefig("attachments/lethality_trends.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: lethality_trends.png")
 
 
-def run_analysis():
+def run_analysis(df_clean=None):
     """Main function to run the entire analysis pipeline."""
-    df = load_data()
-    if df is None:
-        return
-
-    # Prepare data
-    df_clean = prepare_data(df)
+    # main.py passes in the frame it has already loaded for every script
+    if df_clean is None:
+        df_clean = load_data()
+        if df_clean is None:
+            return
 
     # --- Global Analysis ---
     print("--- Analyzing Top 20 Deadliest Attacks Globally ---")
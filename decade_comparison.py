@@ -3,19 +3,34 @@ Decade Comparison Analysis
 Analyzes how terrorism has evolved across different decades.
 """
 
-import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")  # charts are only saved; also safe in worker processes
 import matplotlib.pyplot as plt
 import numpy as np
 
+import common
+
 # Configuration
 USE_FULL_DATASET = True
+NEEDED_COLUMNS = [
+    "Year",
+    "Country",
+    "Region",
+    "AttackType",
+    "Killed",
+    "Wounded",
+    "Group",
+    "Target_type",
+    "Weapon_type",
+]
 
 
 def load_data():
-    """Loads the terrorism data from Excel file."""
-    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.xlsx"
+    """Loads the cleaned terrorism data (renamed, numeric casualties)."""
+    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.parquet"
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_clean_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
@@ -24,53 +39,28 @@ def load_data():
 
 
 def prepare_data(df):
-    """Renames columns and prepares data for analysis."""
-    df.rename(
-        columns={
-            "iyear": "Year",
-            "imonth": "Month",
-            "iday": "Day",
-            "country_txt": "Country",
-            "region_txt": "Region",
-            "attacktype1_txt": "AttackType",
-            "target1": "Target",
-            "nkill": "Killed",
-            "nwound": "Wounded",
-            "gname": "Group",
-            "targtype1_txt": "Target_type",
-            "weaptype1_txt": "Weapon_type",
-        },
-        inplace=True,
+    """Returns the cleaned data with decade columns added."""
+    decade = (df["Year"] // 10) * 10
+    return df.assign(
+        Decade=decade, Decade_Label=(decade.astype(str) + "s").astype("category")
     )
 
-    df["Killed"] = pd.to_numeric(df["Killed"], errors="coerce").fillna(0)
-    df["Wounded"] = pd.to_numeric(df["Wounded"], errors="coerce").fillna(0)
-    df["Decade"] = (df["Year"] // 10) * 10
-    df["Decade_Label"] = df["Decade"].astype(str) + "s"
-    return df
+
+def compute_decade_stats(df):
+    """Aggregates attacks, casualties, countries and groups per decade in one pass."""
+    return df.groupby("Decade_Label", observed=True).agg(
+        Attacks=("Year", "size"),
+        Killed=("Killed", "sum"),
+        Wounded=("Wounded", "sum"),
+        Countries_Affected=("Country", "nunique"),
+        Active_Groups=("Group", "nunique"),
+    )
 
 
-def analyze_decade_overview(df):
+def analyze_decade_overview(decade_stats):
     """Provides overview statistics by decade."""
-    decade_stats = df.groupby("Decade_Label").agg(
-        {
-            "Year": "count",
-            "Killed": "sum",
-            "Wounded": "sum",
-            "Country": "nunique",
-            "Group": "nunique",
-        }
-    )
-    decade_stats.columns = [
-        "Attacks",
-        "Killed",
-        "Wounded",
-        "Countries_Affected",
-        "Active_Groups",
-    ]
-    decade_stats["Avg_Killed_Per_Attack"] = (
-        decade_stats["Killed"] / decade_stats["Attacks"]
-    ).round(2)
+    avg_killed = (decade_stats["Killed"] / decade_stats["Attacks"]).round(2)
+    decade_stats = decade_stats.assign(Avg_Killed_Per_Attack=avg_killed)
 
     print("\n" + "=" * 70)
     print("TERRORISM BY DECADE - OVERVIEW")
@@ -80,40 +70,29 @@ def analyze_decade_overview(df):
     return decade_stats
 
 
-def plot_decade_attacks(df):
+def plot_decade_attacks(decade_stats):
     """Plots attack counts by decade."""
-    decade_counts = df["Decade_Label"].value_counts().sort_index()
+    decade_counts = decade_stats["Attacks"]
 
     plt.figure(figsize=(12, 6))
     cmap = plt.get_cmap("Reds")
     colors = cmap(np.linspace(0.3, 0.9, len(decade_counts)))
     bars = plt.bar(decade_counts.index, decade_counts.values, color=colors)
 
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(
-            bar.get_x() + bar.get_width() / 2.0,
-            height,
-            f"{int(height):,}",
-            ha="center",
-            va="bottom",
-            fontsize=10,
-        )
+    plt.bar_label(bars, fmt="{:,.0f}", padding=3, fontsize=10)
 
     plt.xlabel("Decade")
     plt.ylabel("Number of Attacks")
     plt.title("Terrorist Attacks by Decade")
     plt.tight_layout()
     plt.savefig("attacks_by_decade.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: attacks_by_decade.png")
 
 
-def plot_decade_casualties(df):
+def plot_decade_casualties(decade_stats):
     """Plots casualties by decade."""
-    decade_casualties = (
-        df.groupby("Decade_Label").agg({"Killed": "sum", "Wounded": "sum"}).sort_index()
-    )
+    decade_casualties = decade_stats[["Killed", "Wounded"]]
 
     fig, ax = plt.subplots(figsize=(12, 6))
     x = np.arange(len(decade_casualties))
@@ -142,18 +121,26 @@ def plot_decade_casualties(df):
     ax.legend()
     plt.tight_layout()
     plt.savefig("casualties_by_decade.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: casualties_by_decade.png")
 
 
+def decade_percentages(df, column):
+    """Returns each category's share (%) of the attacks in every decade."""
+    counts = (
+        df.groupby(["Decade_Label", column], observed=True)
+        .size()
+        .unstack(fill_value=0)
+    )
+    return counts.div(counts.sum(axis=1), axis=0) * 100
+
+
 def analyze_attack_type_evolution(df):
     """Analyzes how attack types have changed across decades."""
-    attack_decade = (
-        pd.crosstab(df["Decade_Label"], df["AttackType"], normalize="index") * 100
-    )
+    attack_decade = decade_percentages(df, "AttackType")
 
-    plt.figure(figsize=(14, 8))
-    attack_decade.plot(kind="bar", stacked=True, figsize=(14, 8), colormap="tab20")
+    fig, ax = plt.subplots(figsize=(14, 8))
+    attack_decade.plot(kind="bar", stacked=True, ax=ax, colormap="tab20")
     plt.xlabel("Decade")
     plt.ylabel("Percentage")
     plt.title("Evolution of Attack Types by Decade")
@@ -161,18 +148,16 @@ def analyze_attack_type_evolution(df):
     plt.xticks(rotation=0)
     plt.tight_layout()
     plt.savefig("attack_type_evolution.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: attack_type_evolution.png")
 
 
 def analyze_regional_shift(df):
     """Analyzes how terrorism hotspots have shifted across decades."""
-    region_decade = (
-        pd.crosstab(df["Decade_Label"], df["Region"], normalize="index") * 100
-    )
+    region_decade = decade_percentages(df, "Region")
 
     # Get top 6 regions overall
-    top_regions = df["Region"].value_counts().nlargest(6).index.tolist()
+    top_regions = common.count_values(df["Region"]).nlargest(6).index.tolist()
     region_decade_top = region_decade[top_regions]
 
     plt.figure(figsize=(14, 6))
@@ -192,18 +177,16 @@ def analyze_regional_shift(df):
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.savefig("regional_shift_by_decade.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: regional_shift_by_decade.png")
 
 
 def analyze_weapon_evolution(df):
     """Analyzes how weapon preferences have changed."""
-    weapon_decade = (
-        pd.crosstab(df["Decade_Label"], df["Weapon_type"], normalize="index") * 100
-    )
+    weapon_decade = decade_percentages(df, "Weapon_type")
 
-    plt.figure(figsize=(14, 8))
-    weapon_decade.plot(kind="bar", stacked=True, figsize=(14, 8), colormap="Set3")
+    fig, ax = plt.subplots(figsize=(14, 8))
+    weapon_decade.plot(kind="bar", stacked=True, ax=ax, colormap="Set3")
     plt.xlabel("Decade")
     plt.ylabel("Percentage")
     plt.title("Evolution of Weapon Types by Decade")
@@ -211,31 +194,27 @@ def analyze_weapon_evolution(df):
     plt.xticks(rotation=0)
     plt.tight_layout()
     plt.savefig("attachments/weapon_evolution.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: weapon_evolution.png")
 
 
 def analyze_target_evolution(df):
     """Analyzes how target preferences have changed."""
-    # Get top 8 target types
-    top_targets = df["Target_type"].value_counts().nlargest(8).index.tolist()
-    df_top = df[df["Target_type"].isin(top_targets)]
+    target_decade = decade_percentages(df, "Target_type")
 
-    target_decade = (
-        pd.crosstab(df_top["Decade_Label"], df_top["Target_type"], normalize="index")
-        * 100
-    )
+    # Get top 8 target types
+    top_targets = common.count_values(df["Target_type"]).nlargest(8).index.tolist()
+    target_decade_top = target_decade[top_targets]
 
     plt.figure(figsize=(14, 6))
     for target in top_targets:
-        if target in target_decade.columns:
-            plt.plot(
-                target_decade.index,
-                target_decade[target],
-                marker="s",
-                linewidth=2,
-                label=target,
-            )
+        plt.plot(
+            target_decade_top.index,
+            target_decade_top[target],
+            marker="s",
+            linewidth=2,
+            label=target,
+        )
 
     plt.xlabel("Decade")
     plt.ylabel("Percentage of Attacks")
@@ -244,41 +223,39 @@ def analyze_target_evolution(df):
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.savefig("attachments/target_evolution.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: target_evolution.png")
 
 
-def run_analysis():
+def run_analysis(df=None):
     """Main function to run the entire analysis pipeline."""
-    df = load_data()
+    # main.py passes in the frame it has already loaded for every script
     if df is None:
-        return
+        df = load_data()
+        if df is None:
+            return
 
-    # Prepare data
-    df_clean = prepare_data(df)
+    # Prepare data; a shared frame may hold more columns than the workers need
+    df_clean = prepare_data(df[NEEDED_COLUMNS])
 
-    # --- Decade Overview ---
-    analyze_decade_overview(df_clean)
+    # Per-decade totals shared by the overview and the decade charts
+    decade_stats = compute_decade_stats(df_clean)
 
-    # --- Overall Trend Comparison ---
-    print("--- Comparing Overall Attack Trends Across Decades ---")
-    plot_decade_attacks(df_clean)
-
-    # --- Regional Shift Analysis ---
-    print("\n--- Analyzing Regional Shifts in Terrorism Across Decades ---")
-    analyze_regional_shift(df_clean)
-
-    # --- Tactical Evolution Analysis ---
-    print("\n--- Analyzing Evolution of Attack Types Across Decades ---")
-    analyze_attack_type_evolution(df_clean)
-
-    # --- Weapon Preference Analysis ---
-    print("\n--- Analyzing Evolution of Weapon Types Across Decades ---")
-    analyze_weapon_evolution(df_clean)
-
-    # --- Target Preference Analysis ---
-    print("\n--- Analyzing Evolution of Target Types Across Decades ---")
-    analyze_target_evolution(df_clean)
+    # --- Decade Overview ---
+    analyze_decade_overview(decade_stats)
+
+    # --- Trend, Regional, Tactical, Weapon and Target Charts ---
+    # The charts are independent, so they are rendered in worker processes
+    print("--- Charting Attack Trends, Regions, Tactics, Weapons and Targets ---")
+    common.run_parallel(
+        [
+            (plot_decade_attacks, decade_stats),
+            (analyze_regional_shift, df_clean),
+            (analyze_attack_type_evolution, df_clean),
+            (analyze_weapon_evolution, df_clean),
+            (analyze_target_evolution, df_clean),
+        ]
+    )
 
     print("\nDecade comparison analysis complete. Plots saved to 'attachments' directory.")
 
@@ -4,19 +4,36 @@ Deep dive into terrorist organizations: activity patterns, methods, and evolutio
 """
 
 import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
+import common
+
 # Configuration
 USE_FULL_DATASET = True
 
+# Columns used by this analysis (cleaned names)
+NEEDED_COLUMNS = [
+    "Year",
+    "Country",
+    "Region",
+    "AttackType",
+    "Killed",
+    "Wounded",
+    "Group",
+    "Target_type",
+]
+
 
 def load_data():
-    """Loads the terrorism data from Excel file."""
-    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.xlsx"
+    """Loads the cleaned terrorism data (renamed, numeric casualties)."""
+    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.parquet"
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_clean_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
@@ -24,52 +41,66 @@ def load_data():
         return None
 
 
-def prepare_data(df):
-    """Renames columns and prepares data for analysis."""
-    df.rename(
-        columns={
-            "iyear": "Year",
-            "imonth": "Month",
-            "iday": "Day",
-            "country_txt": "Country",
-            "region_txt": "Region",
-            "attacktype1_txt": "AttackType",
-            "target1": "Target",
-            "nkill": "Killed",
-            "nwound": "Wounded",
-            "gname": "Group",
-            "targtype1_txt": "Target_type",
-            "weaptype1_txt": "Weapon_type",
+def _distinct_per_group(group_codes, n_groups, values):
+    """Counts distinct non-missing values of a categorical per group code."""
+    codes = values.cat.codes.to_numpy()
+    valid = codes >= 0
+    pairs = np.unique(group_codes[valid] * len(values.cat.categories) + codes[valid])
+    return np.bincount(pairs // len(values.cat.categories), minlength=n_groups)
+
+
+def compute_group_stats(df):
+    """
+    Per-group attack counts, active years, casualty sums and
+    country/region counts, computed on the Group codes in one pass per
+    statistic instead of a pandas groupby aggregation.
+    """
+    group_codes = df["Group"].cat.codes.to_numpy()
+    # Rows without a group are dropped, as groupby does with missing keys
+    valid = group_codes >= 0
+    # bincount and ufunc.at index with intp; converting the int8/int16
+    # codes once keeps every pass below on one contiguous index array
+    group_codes = np.ascontiguousarray(group_codes[valid], dtype=np.intp)
+    n_groups = len(df["Group"].cat.categories)
+    year = df["Year"].to_numpy()[valid]
+
+    attacks = np.bincount(group_codes, minlength=n_groups)
+    first_year = np.full(n_groups, np.iinfo(year.dtype).max, dtype=year.dtype)
+    np.minimum.at(first_year, group_codes, year)
+    last_year = np.full(n_groups, np.iinfo(year.dtype).min, dtype=year.dtype)
+    np.maximum.at(last_year, group_codes, year)
+
+    stats = pd.DataFrame(
+        {
+            "Attacks": attacks,
+            "First_Year": first_year,
+            "Last_Year": last_year,
+            "Killed": np.bincount(
+                group_codes,
+                weights=df["Killed"].to_numpy()[valid],
+                minlength=n_groups,
+            ),
+            "Wounded": np.bincount(
+                group_codes,
+                weights=df["Wounded"].to_numpy()[valid],
+                minlength=n_groups,
+            ),
+            "Countries": _distinct_per_group(
+                group_codes, n_groups, df["Country"][valid]
+            ),
+            "Regions": _distinct_per_group(
+                group_codes, n_groups, df["Region"][valid]
+            ),
         },
-        inplace=True,
+        index=df["Group"].cat.categories.rename("Group"),
     )
-
-    df["Killed"] = pd.to_numeric(df["Killed"], errors="coerce").fillna(0)
-    df["Wounded"] = pd.to_numeric(df["Wounded"], errors="coerce").fillna(0)
-    df["Casualties"] = df["Killed"] + df["Wounded"]
-    return df
+    # Keep only groups that occur, like groupby(..., observed=True)
+    return stats[attacks > 0]
 
 
-def analyze_most_active_groups(df, top_n=20):
+def analyze_most_active_groups(df_known, top_n=20):
     """Analyzes the most active terrorist groups."""
-    df_known = df[df["Group"] != "Unknown"]
-
-    group_stats = df_known.groupby("Group").agg(
-        {
-            "Year": ["count", "min", "max"],
-            "Killed": "sum",
-            "Wounded": "sum",
-            "Country": "nunique",
-        }
-    )
-    group_stats.columns = [
-        "Attacks",
-        "First_Year",
-        "Last_Year",
-        "Killed",
-        "Wounded",
-        "Countries",
-    ]
+    group_stats = compute_group_stats(df_known)
     group_stats["Active_Years"] = (
         group_stats["Last_Year"] - group_stats["First_Year"] + 1
     )
@@ -88,7 +119,7 @@ def analyze_most_active_groups(df, top_n=20):
     plt.gca().invert_yaxis()
     plt.tight_layout()
     plt.savefig("attachments/most_active_groups.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: most_active_groups.png")
 
     print("\n" + "=" * 70)
@@ -104,15 +135,15 @@ def analyze_most_active_groups(df, top_n=20):
     return top_groups
 
 
-def analyze_group_activity_timeline(df, groups=None):
-    """Plots activity timeline for major groups."""
-    df_known = df[df["Group"] != "Unknown"]
+def top_groups_data(df_known, top_n=10):
+    """Returns the top_n most active known groups and their attacks."""
+    groups = common.count_values(df_known["Group"]).nlargest(top_n).index.tolist()
+    return groups, df_known[common.category_mask(df_known["Group"], groups)]
 
-    if groups is None:
-        groups = df_known["Group"].value_counts().nlargest(10).index.tolist()
 
-    df_top = df_known[df_known["Group"].isin(groups)]
-    yearly_activity = pd.crosstab(df_top["Year"], df_top["Group"])
+def analyze_group_activity_timeline(df_top, groups):
+    """Plots activity timeline for major groups."""
+    yearly_activity = common.count_table(df_top, "Year", "Group")
 
     plt.figure(figsize=(14, 8))
     for group in groups:
@@ -128,19 +159,13 @@ def analyze_group_activity_timeline(df, groups=None):
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.savefig("group_activity_timeline.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: group_activity_timeline.png")
 
 
-def analyze_group_methods(df, top_n=10):
+def analyze_group_methods(df_top):
     """Analyzes preferred attack methods of major groups."""
-    df_known = df[df["Group"] != "Unknown"]
-    top_groups = df_known["Group"].value_counts().nlargest(top_n).index.tolist()
-
-    df_top = df_known[df_known["Group"].isin(top_groups)]
-    method_pivot = (
-        pd.crosstab(df_top["Group"], df_top["AttackType"], normalize="index") * 100
-    )
+    method_pivot = common.count_table(df_top, "Group", "AttackType", normalize=True)
 
     plt.figure(figsize=(14, 10))
     sns.heatmap(
@@ -152,23 +177,20 @@ def analyze_group_methods(df, top_n=10):
     )
     plt.title("Attack Methods by Terrorist Group (%)")
     plt.tight_layout()
-    plt.savefig("group_methods_heatmap.png", dpi=150)
-    plt.show()
+    plt.savefig("group_methods_heatmap.png", dpi=100)
+    plt.close()
     print("Saved: group_methods_heatmap.png")
 
 
-def analyze_group_targets(df, top_n=10):
+def analyze_group_targets(df_known, df_top):
     """Analyzes preferred targets of major groups."""
-    df_known = df[df["Group"] != "Unknown"]
-    top_groups = df_known["Group"].value_counts().nlargest(top_n).index.tolist()
-    top_targets = df_known["Target_type"].value_counts().nlargest(8).index.tolist()
-
-    df_filtered = df_known[
-        df_known["Group"].isin(top_groups) & df_known["Target_type"].isin(top_targets)
-    ]
-    target_pivot = (
-        pd.crosstab(df_filtered["Group"], df_filtered["Target_type"], normalize="index")
-        * 100
+    top_targets = (
+        common.count_values(df_known["Target_type"]).nlargest(8).index.tolist()
+    )
+
+    df_filtered = df_top[common.category_mask(df_top["Target_type"], top_targets)]
+    target_pivot = common.count_table(
+        df_filtered, "Group", "Target_type", normalize=True
     )
 
     plt.figure(figsize=(14, 10))
@@ -181,19 +203,14 @@ def analyze_group_targets(df, top_n=10):
     )
     plt.title("Target Preferences by Terrorist Group (%)")
     plt.tight_layout()
-    plt.savefig("group_targets_heatmap.png", dpi=150)
-    plt.show()
+    plt.savefig("group_targets_heatmap.png", dpi=100)
+    plt.close()
     print("Saved: group_targets_heatmap.png")
 
 
-def analyze_group_geographic_spread(df, top_n=15):
+def analyze_group_geographic_spread(df_known, top_n=15):
     """Analyzes geographic spread of major groups."""
-    df_known = df[df["Group"] != "Unknown"]
-
-    group_geo = df_known.groupby("Group").agg(
-        {"Country": "nunique", "Region": "nunique", "Year": "count"}
-    )
-    group_geo.columns = ["Countries", "Regions", "Attacks"]
+    group_geo = compute_group_stats(df_known)[["Countries", "Regions", "Attacks"]]
     group_geo = group_geo[group_geo["Attacks"] >= 100]  # Filter for significant groups
     group_geo = group_geo.nlargest(top_n, "Countries")
 
@@ -220,7 +237,7 @@ def analyze_group_geographic_spread(df, top_n=15):
     ax.invert_yaxis()
     plt.tight_layout()
     plt.savefig("attachments/group_geographic_spread.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: group_geographic_spread.png")
 
     print("\n" + "=" * 60)
@@ -232,19 +249,15 @@ def analyze_group_geographic_spread(df, top_n=15):
         )
 
 
-def analyze_central_asia_groups(df):
+def analyze_central_asia_groups(df_known):
     """Analyzes terrorist groups active in Central Asia."""
-    ca_df = df[df["Region"] == "Central Asia"]
-    ca_df = ca_df[ca_df["Group"] != "Unknown"]
+    ca_df = df_known[df_known["Region"] == "Central Asia"]
 
     if ca_df.empty:
         print("No known group data for Central Asia.")
         return
 
-    group_stats = ca_df.groupby("Group").agg(
-        {"Year": ["count", "min", "max"], "Killed": "sum", "Country": "nunique"}
-    )
-    group_stats.columns = ["Attacks", "First_Year", "Last_Year", "Killed", "Countries"]
+    group_stats = compute_group_stats(ca_df)
     group_stats = group_stats.sort_values("Attacks", ascending=False)
 
     plt.figure(figsize=(12, 6))
@@ -256,7 +269,7 @@ def analyze_central_asia_groups(df):
     plt.gca().invert_yaxis()
     plt.tight_layout()
     plt.savefig("attachments/central_asia_groups.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: central_asia_groups.png")
 
     print("\n" + "=" * 60)
@@ -266,38 +279,43 @@ def analyze_central_asia_groups(df):
         print(f"{group}: {int(row['Attacks'])} attacks, {int(row['Killed'])} killed")
 
 
-def run_analysis():
+def run_analysis(df_clean=None):
     """Main function to run the entire analysis pipeline."""
-    df = load_data()
-    if df is None:
-        return
+    # main.py passes in the frame it has already loaded for every script
+    if df_clean is None:
+        df_clean = load_data()
+        if df_clean is None:
+            return
 
-    # Prepare data
-    df_clean = prepare_data(df)
+    # Every analysis below only looks at attacks by known groups
+    df_known = df_clean.loc[df_clean["Group"].ne("Unknown")]
 
     # --- Overall Group Activity ---
     print("--- Analyzing Overall Terrorist Group Activity ---")
-    analyze_most_active_groups(df_clean, top_n=20)
+    analyze_most_active_groups(df_known, top_n=20)
+
+    # The timeline, tactics and target analyses share the top 10 known groups
+    top_groups, df_top = top_groups_data(df_known, top_n=10)
 
     # --- Temporal Analysis of Top Groups ---
     print("\n--- Analyzing Temporal Trends of Top 5 Groups ---")
-    analyze_group_activity_timeline(df_clean)
+    analyze_group_activity_timeline(df_top, top_groups)
 
     # --- Tactical Analysis of Top Groups ---
     print("\n--- Analyzing Tactics of Top 10 Groups ---")
-    analyze_group_methods(df_clean, top_n=10)
+    analyze_group_methods(df_top)
 
     # --- Geographical Footprint of Top Groups ---
     print("\n--- Analyzing Geographical Footprint of Top 15 Groups ---")
-    analyze_group_geographic_spread(df_clean, top_n=15)
+    analyze_group_geographic_spread(df_known, top_n=15)
 
     # --- Target Analysis ---
     print("\n--- Analyzing Targets of Top 10 Groups ---")
-    analyze_group_targets(df_clean, top_n=10)
+    analyze_group_targets(df_known, df_top)
 
     # --- Central Asia Analysis ---
     print("\n--- Analyzing Groups in Central Asia ---")
-    analyze_central_asia_groups(df_clean)
+    analyze_central_asia_groups(df_known)
 
     print("\nGroup analysis complete. Plots saved to 'attachments' directory.")
 
@@ -1,6 +1,17 @@
-import pandas as pd
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-import seaborn as sns
+
+import common
+
+# Columns used by this analysis (raw GTD names)
+NEEDED_COLUMNS = ["country_txt", "gname", "weaptype1_txt"]
+
+# Directory for the saved charts, created by run_analysis
+OUT_DIR = Path("attachments")
 
 
 def load_data(file_path):
@@ -8,7 +19,7 @@ def load_data(file_path):
     Loads the terrorism data from an Excel file.
     """
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
@@ -16,99 +27,88 @@ def load_data(file_path):
         return None
 
 
-def analyze_kazakhstan_weapon_types(df):
+def analyze_kazakhstan_weapon_types(kaz_df):
     """
     Analyzes and plots the types of weapons used in terrorist attacks in Kazakhstan.
     """
-    kaz_df = df[df["Country"] == "Kazakhstan"].copy()
-
     if kaz_df.empty:
         print("No data available for Kazakhstan.")
         return
 
     print("\n--- Weapon Types Analysis for Kazakhstan ---")
 
+    weapon_counts = common.count_values(kaz_df["Weapon_type"])
+
     plt.figure(figsize=(12, 8))
-    sns.countplot(
-        y="Weapon_type", data=kaz_df, order=kaz_df["Weapon_type"].value_counts().index
-    )
+    # Most common weapon on top, as in seaborn's countplot
+    plt.barh(weapon_counts.index.astype(str)[::-1], weapon_counts.values[::-1])
     plt.title("Weapon Types Used in Attacks in Kazakhstan")
     plt.xlabel("Number of Incidents")
     plt.ylabel("Weapon Type")
     plt.tight_layout()
-    plt.savefig("attachments/kazakhstan_weapon_types.png")
-    plt.show()
+    plt.savefig(OUT_DIR / "kazakhstan_weapon_types.png")
+    plt.close()
 
     # Print the top 3 weapon types
-    top_weapons = kaz_df["Weapon_type"].value_counts().nlargest(3)
+    top_weapons = weapon_counts.nlargest(3)
     print("\n--- Top 3 Weapon Types in Kazakhstan ---")
     print(top_weapons)
 
 
-def analyze_kazakhstan_terrorist_groups(df):
+def analyze_kazakhstan_terrorist_groups(kaz_df):
     """
     Analyzes and plots the terrorist groups operating in Kazakhstan.
     """
-    kaz_df = df[df["Country"] == "Kazakhstan"].copy()
-
-    # Exclude 'Unknown' groups for a more meaningful analysis
-    kaz_df = kaz_df[kaz_df["Group"] != "Unknown"]
+    # Exclude 'Unknown' groups for a more meaningful analysis. They are left
+    # out before counting, so ties rank as among the known rows alone
+    groups = kaz_df["Group"]
+    group_counts = common.count_values(groups[groups.ne("Unknown")])
 
-    if kaz_df.empty:
+    if group_counts.empty:
         print("No data available for known terrorist groups in Kazakhstan.")
         return
 
     print("\n--- Terrorist Groups Analysis for Kazakhstan ---")
 
     plt.figure(figsize=(12, 8))
-    sns.countplot(y="Group", data=kaz_df, order=kaz_df["Group"].value_counts().index)
+    plt.barh(group_counts.index.astype(str)[::-1], group_counts.values[::-1])
     plt.title("Terrorist Groups Operating in Kazakhstan")
     plt.xlabel("Number of Attacks")
     plt.ylabel("Group")
     plt.tight_layout()
-    plt.savefig("attachments/kazakhstan_terrorist_groups.png")
-    plt.show()
+    plt.savefig(OUT_DIR / "kazakhstan_terrorist_groups.png")
+    plt.close()
 
     # Print the top 3 groups
-    top_groups = kaz_df["Group"].value_counts().nlargest(3)
+    top_groups = group_counts.nlargest(3)
     print("\n--- Top 3 Terrorist Groups in Kazakhstan ---")
     print(top_groups)
 
 
-def run_analysis():
+def run_analysis(df=None):
     """
     Main function to run the detailed analysis for Kazakhstan.
     """
-    file_path = "gtd.xlsx"
-    df = load_data(file_path)
+    # main.py passes in the frame it has already loaded for every script
+    if df is None:
+        file_path = "gtd.xlsx"
+        df = load_data(file_path)
 
     if df is not None:
-        # Rename columns for consistency
-        df.rename(
-            columns={
-                "iyear": "Year",
-                "imonth": "Month",
-                "iday": "Day",
-                "country_txt": "Country",
-                "region_txt": "Region",
-                "attacktype1_txt": "AttackType",
-                "target1": "Target",
-                "nkill": "Killed",
-                "nwound": "Wounded",
-                "gname": "Group",
-                "targtype1_txt": "Target_type",
-                "weaptype1_txt": "Weapon_type",
-                "city": "City",
-            },
-            inplace=True,
-        )
+        OUT_DIR.mkdir(exist_ok=True)
+        # Rename columns for consistency (no-op for an already renamed frame)
+        df = df.rename(columns=common.RENAME_MAP)
         # Filter data for Kazakhstan
-        df_kazakhstan = df[df["Country"] == "Kazakhstan"].copy()
+        df_kazakhstan = df.loc[df["Country"].eq("Kazakhstan")].copy()
 
         if df_kazakhstan.empty:
             print("No data found for Kazakhstan in the dataset.")
             return
 
+        # Categories seen only in other countries would show up as empty bars
+        for col in ("Weapon_type", "Group"):
+            df_kazakhstan[col] = df_kazakhstan[col].cat.remove_unused_categories()
+
         print(f"Found {len(df_kazakhstan)} total records for Kazakhstan.")
 
         # --- Analyze Weapon Types ---
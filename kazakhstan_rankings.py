@@ -1,14 +1,25 @@
-import pandas as pd
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-import seaborn as sns
+
+import common
+
+# Columns used by this analysis (cleaned names)
+NEEDED_COLUMNS = ["Country", "AttackType", "Target_type", "City", "Casualties"]
+
+# Directory for the saved charts, created by run_analysis
+OUT_DIR = Path("attachments")
 
 
 def load_data(file_path):
     """
-    Loads the terrorism data from an Excel file.
+    Loads the cleaned terrorism data (renamed, with casualty totals).
     """
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_clean_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
@@ -21,15 +32,12 @@ def rank_countries_by_metric(df, metric, ascending=False):
     Ranks countries by a given metric (e.g., number of attacks, casualties).
     """
     if metric == "Attacks":
-        ranking = df["Country"].value_counts().reset_index()
+        ranking = common.count_values(df["Country"]).reset_index()
         ranking.columns = ["Country", "Count"]
     elif metric == "Casualties":
-        # Ensure 'Killed' and 'Wounded' are numeric, fill NaNs with 0
-        df["Killed"] = pd.to_numeric(df["Killed"], errors="coerce").fillna(0)
-        df["Wounded"] = pd.to_numeric(df["Wounded"], errors="coerce").fillna(0)
-        df["Casualties"] = df["Killed"] + df["Wounded"]
+        # Casualties is filled in once by common.prepare_data
         ranking = (
-            df.groupby("Country")["Casualties"]
+            df.groupby("Country", observed=True)["Casualties"]
             .sum()
             .sort_values(ascending=ascending)
             .reset_index()
@@ -41,12 +49,10 @@ def rank_countries_by_metric(df, metric, ascending=False):
     return ranking
 
 
-def analyze_kazakhstan_data(df):
+def analyze_kazakhstan_data(kaz_df):
     """
     Performs a detailed analysis of terrorism data for Kazakhstan.
     """
-    kaz_df = df[df["Country"] == "Kazakhstan"].copy()
-
     if kaz_df.empty:
         print("No data available for Kazakhstan.")
         return
@@ -54,68 +60,51 @@ def analyze_kazakhstan_data(df):
     print("\n--- Analysis for Kazakhstan ---")
 
     # Ranking of attack types in Kazakhstan
+    # (bars drawn from the counts; largest on top, as in seaborn's countplot)
+    attack_counts = common.count_values(kaz_df["AttackType"])
     plt.figure(figsize=(10, 6))
-    sns.countplot(
-        y="AttackType", data=kaz_df, order=kaz_df["AttackType"].value_counts().index
-    )
+    plt.barh(attack_counts.index.astype(str)[::-1], attack_counts.values[::-1])
     plt.title("Attack Types in Kazakhstan")
     plt.xlabel("Number of Attacks")
     plt.ylabel("Attack Type")
     plt.tight_layout()
     plt.savefig("kazakhstan_attack_types.png")
-    plt.show()
+    plt.close()
 
     # Ranking of target types in Kazakhstan
+    target_counts = common.count_values(kaz_df["Target_type"])
     plt.figure(figsize=(10, 6))
-    sns.countplot(
-        y="Target_type", data=kaz_df, order=kaz_df["Target_type"].value_counts().index
-    )
+    plt.barh(target_counts.index.astype(str)[::-1], target_counts.values[::-1])
     plt.title("Target Types in Kazakhstan")
     plt.xlabel("Number of Attacks")
     plt.ylabel("Target Type")
     plt.tight_layout()
     plt.savefig("kazakhstan_target_types.png")
-    plt.show()
+    plt.close()
 
     # Ranking of cities by attacks in Kazakhstan
+    city_counts = common.count_values(kaz_df["City"])
     plt.figure(figsize=(10, 6))
-    sns.countplot(y="city", data=kaz_df, order=kaz_df["city"].value_counts().index)
+    plt.barh(city_counts.index.astype(str)[::-1], city_counts.values[::-1])
     plt.title("Attacks by City in Kazakhstan")
     plt.xlabel("Number of Attacks")
     plt.ylabel("City")
     plt.tight_layout()
-    plt.savefig("attachments/kazakhstan_attacks_by_city.png")
-    plt.show()
+    plt.savefig(OUT_DIR / "kazakhstan_attacks_by_city.png")
+    plt.close()
 
 
-def run_analysis():
+def run_analysis(df=None):
     """
     Main function to run the Kazakhstan rankings analysis.
     """
-    file_path = "gtd.xlsx"
-    df = load_data(file_path)
+    # main.py passes in the frame it has already loaded for every script
+    if df is None:
+        file_path = "gtd.xlsx"
+        df = load_data(file_path)
 
     if df is not None:
-        # Rename columns for consistency
-        df.rename(
-            columns={
-                "iyear": "Year",
-                "imonth": "Month",
-                "iday": "Day",
-                "country_txt": "Country",
-                "region_txt": "Region",
-                "attacktype1_txt": "AttackType",
-                "target1": "Target",
-                "nkill": "Killed",
-                "nwound": "Wounded",
-                "gname": "Group",
-                "targtype1_txt": "Target_type",
-                "weaptype1_txt": "Weapon_type",
-                "city": "City",
-            },
-            inplace=True,
-        )
-
+        OUT_DIR.mkdir(exist_ok=True)
         # --- Rank by Number of Attacks ---
         print("--- Ranking Countries by Number of Attacks ---")
         attacks_rank_df = rank_countries_by_metric(df, "Attacks")
@@ -139,7 +128,11 @@ def run_analysis():
         # )
 
         # --- Detailed analysis for Kazakhstan ---
-        analyze_kazakhstan_data(df)
+        kaz_df = df.loc[df["Country"].eq("Kazakhstan")].copy()
+        # Categories seen only in other countries would show up as empty bars
+        for col in ("AttackType", "Target_type", "City"):
+            kaz_df[col] = kaz_df[col].cat.remove_unused_categories()
+        analyze_kazakhstan_data(kaz_df)
 
         print("\nAnalysis complete. Plots and rankings have been generated.")
 
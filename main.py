@@ -1,3 +1,8 @@
+import matplotlib
+
+# Charts are only saved to files, so render without a GUI backend
+matplotlib.use("Agg")
+
 import create_mini_dataset
 import analyze
 import analyze_per_capita
@@ -10,40 +15,60 @@ import decade_comparison
 import kazakhstan_rankings
 import kazakhstan_details
 
+import common
 
-def main():
-    # 1. Create a smaller dataset for faster testing (optional)
-    # create_mini_dataset.create_mini_dataset(rows_to_keep=5000)
-
+# Scripts run by main, in the order they are listed
+ANALYSES = [
     # 2. Perform initial analysis
-    analyze.run_analysis()
-
+    analyze,
     # 3. Analyze attacks per capita
-    analyze_per_capita.run_analysis()
-
+    analyze_per_capita,
     # 4. Analyze success rates
-    success_rate_analysis.run_analysis()
-
+    success_rate_analysis,
     # 5. Analyze seasonal patterns
-    seasonal_patterns.run_analysis()
-
+    seasonal_patterns,
     # 6. Analyze deadliest attacks
-    deadliest_attacks.run_analysis()
-
+    deadliest_attacks,
     # 7. Analyze terrorist groups
-    group_analysis.run_analysis()
-
+    group_analysis,
     # 8. Analyze target vulnerability
-    target_vulnerability.run_analysis()
-
+    target_vulnerability,
     # 9. Compare decades
-    decade_comparison.run_analysis()
-
+    decade_comparison,
     # 10. Find Kazakhstan's rankings
-    kazakhstan_rankings.run_analysis()
-
+    kazakhstan_rankings,
     # 11. Get details on attacks in Kazakhstan
-    kazakhstan_details.run_analysis()
+    kazakhstan_details,
+]
+
+
+def needed_columns():
+    """Returns the cleaned columns read by any of the analyses."""
+    needed = {
+        common.RENAME_MAP.get(col, col)
+        for module in ANALYSES
+        for col in module.NEEDED_COLUMNS
+    }
+    return [col for col in common.CLEAN_COLUMNS if col in needed]
+
+
+def main():
+    # 1. Create a smaller dataset for faster testing (optional)
+    # create_mini_dataset.create_mini_dataset(rows_to_keep=5000)
+
+    # Load and prepare the data once and share it with every analysis. Only
+    # the columns the analyses read are loaded, so the free-text Summary and
+    # Motive columns are not pickled into every worker
+    try:
+        df = common.load_clean_data("gtd.xlsx", columns=needed_columns())
+    except FileNotFoundError:
+        print("Error: gtd.xlsx not found.")
+        return
+
+    # 2-11. The analyses only read the shared frame and write their own
+    # charts, so they run side by side in worker processes; their printed
+    # reports may interleave
+    common.run_parallel([(module.run_analysis, df) for module in ANALYSES])
 
 
 if __name__ == "__main__":
@@ -1,44 +1,59 @@
-import pandas as pd
+import numpy as np
 from countryinfo import CountryInfo
 
+import common
+
+# Columns used by this analysis (raw GTD names)
+NEEDED_COLUMNS = ["country_txt"]
+
 def load_data(file_path):
     """
     Loads the terrorism data from an Excel file.
     """
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
         print(f"Error: The file {file_path} was not found.")
         return None
 
-def get_population(country_name):
+def load_population_lookup():
+    """
+    Loads the CountryInfo data once and maps lower-cased country names and
+    alternative spellings to populations, resolving names like CountryInfo().
+    """
+    countries = CountryInfo().all()
+    names = {name: name for name in countries}
+    for name, info in countries.items():
+        for spelling in info.get('altSpellings', []):
+            names[spelling.lower()] = name
+    return {spelling: countries[name].get('population') for spelling, name in names.items()}
+
+def get_population(country_name, population_lookup):
     """
     Gets the population of a country.
     """
-    try:
-        # Handle special cases for country names
-        if country_name == 'Russia':
-            country_name = 'Russian Federation'
-        elif country_name == 'South Korea':
-            country_name = 'Korea, Republic of'
-        elif country_name == 'West Bank and Gaza Strip':
-            return 5044000 # Approximate population
-
-        country = CountryInfo(country_name)
-        return country.population()
-    except (KeyError, ValueError):
-        return None
+    # Handle special cases for country names
+    if country_name == 'Russia':
+        country_name = 'Russian Federation'
+    elif country_name == 'South Korea':
+        country_name = 'Korea, Republic of'
+    elif country_name == 'West Bank and Gaza Strip':
+        return 5044000 # Approximate population
+
+    return population_lookup.get(country_name.lower())
 
 def rank_by_attacks_per_capita(df):
     """
     Ranks countries by terrorist attacks per capita.
     """
-    attacks_by_country = df['Country'].value_counts().reset_index()
+    attacks_by_country = common.count_values(df['Country']).reset_index()
     attacks_by_country.columns = ['Country', 'AttackCount']
 
-    attacks_by_country['Population'] = attacks_by_country['Country'].apply(get_population)
+    population_lookup = load_population_lookup()
+    populations = {country: get_population(country, population_lookup) for country in attacks_by_country['Country']}
+    attacks_by_country['Population'] = attacks_by_country['Country'].map(populations).astype(float)
 
     # Remove countries where population could not be found
     attacks_by_country.dropna(subset=['Population'], inplace=True)
@@ -55,18 +70,18 @@ if __name__ == "__main__":
     gtd_df = load_data(file_to_use)
 
     if gtd_df is not None:
-        gtd_df.rename(columns={'country_txt':'Country'}, inplace=True)
+        gtd_df = gtd_df.rename(columns=common.RENAME_MAP)
 
         per_capita_ranking = rank_by_attacks_per_capita(gtd_df)
 
         print("--- Top 20 Countries by Attacks Per Capita (per million people) ---")
         print(per_capita_ranking.head(20))
 
-        kaz_rank = per_capita_ranking[per_capita_ranking['Country'] == 'Kazakhstan']
+        # Positions of Kazakhstan in the sorted ranking, found on the values
+        kaz_positions = np.flatnonzero(per_capita_ranking['Country'].eq('Kazakhstan').to_numpy())
 
-        if not kaz_rank.empty:
-            # Get the rank by finding the index in the sorted dataframe
-            rank_value = per_capita_ranking.index.get_loc(kaz_rank.index[0]) + 1
+        if kaz_positions.size:
+            rank_value = kaz_positions[0] + 1
             print(f"\nKazakhstan's Rank (Attacks Per Capita): {rank_value}")
         else:
             print("\nCould not determine Kazakhstan's rank.")
@@ -4,19 +4,42 @@ Analyzes monthly, weekly, and seasonal trends in terrorist attacks.
 """
 
 import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
+import common
+
 # Configuration
 USE_FULL_DATASET = True
 
+# Columns used by this analysis (cleaned names)
+NEEDED_COLUMNS = [
+    "Year",
+    "Month",
+    "Day",
+    "Region",
+    "Killed",
+    "Wounded",
+]
+
+# Meteorological seasons, in chart order, and the position in SEASONS of
+# each month number (0 is the unknown month, which maps to -1, no season)
+SEASONS = ["Winter", "Spring", "Summer", "Autumn"]
+SEASON_OF_MONTH = np.array([-1, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+
+# Bar colours of the twelve months, from cool to warm
+MONTH_COLORS = plt.get_cmap("RdYlBu_r")(np.linspace(0.2, 0.8, 12))
+
 
 def load_data():
-    """Loads the terrorism data from Excel file."""
-    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.xlsx"
+    """Loads the cleaned terrorism data (renamed, numeric casualties)."""
+    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.parquet"
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_clean_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
@@ -25,44 +48,26 @@ def load_data():
 
 
 def prepare_data(df):
-    """Renames columns and prepares data for analysis."""
-    df.rename(
-        columns={
-            "iyear": "Year",
-            "imonth": "Month",
-            "iday": "Day",
-            "country_txt": "Country",
-            "region_txt": "Region",
-            "attacktype1_txt": "AttackType",
-            "target1": "Target",
-            "nkill": "Killed",
-            "nwound": "Wounded",
-            "gname": "Group",
-            "targtype1_txt": "Target_type",
-            "weaptype1_txt": "Weapon_type",
-        },
-        inplace=True,
+    """Returns a renamed copy of the data prepared for analysis."""
+    # Under Copy-on-Write (see common) this shares the caller's data
+    df = df.rename(columns=common.RENAME_MAP)
+
+    for col in ("Killed", "Wounded"):
+        # Counts stay far below 2**24, where float32 stops being exact
+        counts = pd.to_numeric(df[col], errors="coerce").fillna(0)
+        df[col] = counts.astype("float32")
+
+    # A no-op for frames read through common, which are categorical already
+    for col in common.CATEGORY_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype("category")
+
+    # Add season by indexing the month lookup with the month numbers. Rows
+    # of unknown month (0) are kept, with a missing season, rather than
+    # copying the frame to drop them; each analysis leaves them out
+    df["Season"] = pd.Categorical.from_codes(
+        SEASON_OF_MONTH[df["Month"].to_numpy()], categories=SEASONS, ordered=True
     )
-
-    df["Killed"] = pd.to_numeric(df["Killed"], errors="coerce").fillna(0)
-    df["Wounded"] = pd.to_numeric(df["Wounded"], errors="coerce").fillna(0)
-
-    # Filter out invalid months (0 means unknown)
-    df = df[df["Month"] > 0]
-
-    # Add season
-    def get_season(month):
-        if month in [12, 1, 2]:
-            return "Winter"
-        elif month in [3, 4, 5]:
-            return "Spring"
-        elif month in [6, 7, 8]:
-            return "Summer"
-        else:
-            return "Autumn"
-
-    df["Season"] = df["Month"].apply(get_season)
-
     return df
 
 
@@ -83,16 +88,19 @@ def analyze_monthly_patterns(df):
         "Dec",
     ]
 
-    monthly_attacks = df["Month"].value_counts().sort_index()
-    monthly_casualties = df.groupby("Month")["Killed"].sum()
+    # Month numbers are 1-12, so bincounts count and sum them in one pass
+    # (slot 0 collects the unknown months and is dropped)
+    months = df["Month"].to_numpy()
+    monthly_attacks = np.bincount(months, minlength=13)[1:13]
+    monthly_casualties = np.bincount(
+        months, weights=df["Killed"].to_numpy(), minlength=13
+    )[1:13]
 
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
 
     # Attacks by month
     ax1 = axes[0]
-    cmap = plt.get_cmap("RdYlBu_r")
-    colors = cmap(np.linspace(0.2, 0.8, 12))
-    bars = ax1.bar(month_names, monthly_attacks.values, color=colors)
+    bars = ax1.bar(month_names, monthly_attacks, color=MONTH_COLORS)
     ax1.set_xlabel("Month")
     ax1.set_ylabel("Number of Attacks")
     ax1.set_title("Terrorist Attacks by Month (All Years)")
@@ -106,7 +114,7 @@ def analyze_monthly_patterns(df):
 
     # Casualties by month
     ax2 = axes[1]
-    ax2.bar(month_names, monthly_casualties.values, color="darkred", alpha=0.7)
+    ax2.bar(month_names, monthly_casualties, color="darkred", alpha=0.7)
     ax2.set_xlabel("Month")
     ax2.set_ylabel("Total Killed")
     ax2.set_title("Terrorism Deaths by Month (All Years)")
@@ -120,27 +128,36 @@ def analyze_monthly_patterns(df):
 
     plt.tight_layout()
     plt.savefig("monthly_patterns.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: monthly_patterns.png")
 
     print("\n" + "=" * 50)
     print("MONTHLY ATTACK DISTRIBUTION")
     print("=" * 50)
-    for i, (month, count) in enumerate(zip(month_names, monthly_attacks.values), 1):
+    for i, (month, count) in enumerate(zip(month_names, monthly_attacks), 1):
         pct = count / monthly_attacks.sum() * 100
         print(f"{month}: {count:,} attacks ({pct:.1f}%)")
 
 
 def analyze_seasonal_patterns(df):
     """Analyzes attack patterns by season."""
-    season_order = ["Winter", "Spring", "Summer", "Autumn"]
-
-    seasonal_stats = (
-        df.groupby("Season")
-        .agg({"Year": "count", "Killed": "sum", "Wounded": "sum"})
-        .reindex(season_order)
+    # The Season codes index SEASONS, so bincounts fill the table in order
+    seasons = df["Season"].cat.codes.to_numpy()
+    # Unknown months have no season (code -1)
+    known = seasons >= 0
+    seasons = seasons[known]
+    seasonal_stats = pd.DataFrame(
+        {
+            "Attacks": np.bincount(seasons, minlength=len(SEASONS)),
+            "Killed": np.bincount(
+                seasons, weights=df["Killed"].to_numpy()[known], minlength=len(SEASONS)
+            ),
+            "Wounded": np.bincount(
+                seasons, weights=df["Wounded"].to_numpy()[known], minlength=len(SEASONS)
+            ),
+        },
+        index=pd.Index(SEASONS, name="Season"),
     )
-    seasonal_stats.columns = ["Attacks", "Killed", "Wounded"]
 
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
 
@@ -150,7 +167,7 @@ def analyze_seasonal_patterns(df):
     ax1 = axes[0]
     ax1.pie(
         seasonal_stats["Attacks"],
-        labels=season_order,
+        labels=SEASONS,
         autopct="%1.1f%%",
         colors=colors,
         explode=[0.02] * 4,
@@ -159,7 +176,7 @@ def analyze_seasonal_patterns(df):
 
     # Bar chart for casualties
     ax2 = axes[1]
-    x = np.arange(len(season_order))
+    x = np.arange(len(SEASONS))
     width = 0.35
     ax2.bar(
         x - width / 2, seasonal_stats["Killed"], width, label="Killed", color="darkred"
@@ -168,14 +185,14 @@ def analyze_seasonal_patterns(df):
         x + width / 2, seasonal_stats["Wounded"], width, label="Wounded", color="orange"
     )
     ax2.set_xticks(x)
-    ax2.set_xticklabels(season_order)
+    ax2.set_xticklabels(SEASONS)
     ax2.set_ylabel("Count")
     ax2.set_title("Casualties by Season")
     ax2.legend()
 
     plt.tight_layout()
     plt.savefig("seasonal_patterns.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: seasonal_patterns.png")
 
     print("\n" + "=" * 50)
@@ -186,19 +203,40 @@ def analyze_seasonal_patterns(df):
 
 def analyze_regional_seasonal_patterns(df):
     """Analyzes how seasonal patterns vary by region."""
-    # Get top 6 regions by attack count
-    top_regions = df["Region"].value_counts().nlargest(6).index.tolist()
-    df_top = df[df["Region"].isin(top_regions)]
-
-    season_order = ["Winter", "Spring", "Summer", "Autumn"]
-
-    # Create pivot table
-    pivot = pd.crosstab(df_top["Region"], df_top["Season"])[season_order]
+    # Get top 6 regions by count of attacks with a known month
+    region_counts = common.count_values(df.loc[df["Month"] > 0, "Region"])
+    top_regions = region_counts.nlargest(6).index.tolist()
+
+    # Number the top regions in category order and give other rows -1
+    categories = df["Region"].cat.categories
+    top_codes = np.sort(categories.get_indexer(top_regions))
+    row_of_code = np.full(len(categories) + 1, -1)
+    row_of_code[top_codes] = np.arange(len(top_codes))
+    # Missing regions have code -1, which picks the trailing -1 slot
+    rows = row_of_code[df["Region"].cat.codes.to_numpy()]
+    seasons = df["Season"].cat.codes.to_numpy()
+    # Unknown months have no season (code -1)
+    in_top = (rows >= 0) & (seasons >= 0)
+
+    # Create pivot table by counting each (region, season) cell in one pass
+    cells = rows[in_top] * len(SEASONS) + seasons[in_top]
+    pivot = pd.DataFrame(
+        np.bincount(cells, minlength=len(top_codes) * len(SEASONS)).reshape(
+            len(top_codes), len(SEASONS)
+        ),
+        index=pd.Index(categories[top_codes], name="Region"),
+        columns=pd.Index(SEASONS, name="Season"),
+    )
     pivot_pct = pivot.div(pivot.sum(axis=1), axis=0) * 100
 
-    plt.figure(figsize=(12, 6))
+    # Draw into our own axes; DataFrame.plot would otherwise open a second,
+    # default-sized figure and leave this one open and empty
+    fig, ax = plt.subplots(figsize=(12, 6))
     pivot_pct.plot(
-        kind="bar", width=0.8, color=["#3498db", "#2ecc71", "#e74c3c", "#f39c12"]
+        kind="bar",
+        width=0.8,
+        color=["#3498db", "#2ecc71", "#e74c3c", "#f39c12"],
+        ax=ax,
     )
     plt.xlabel("Region")
     plt.ylabel("Percentage of Attacks")
@@ -207,16 +245,29 @@ def analyze_regional_seasonal_patterns(df):
     plt.xticks(rotation=45, ha="right")
     plt.tight_layout()
     plt.savefig("regional_seasonal_patterns.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: regional_seasonal_patterns.png")
 
 
 def analyze_heatmap_month_year(df):
     """Creates a heatmap of attacks by month and year."""
-    # Filter to recent decades for clarity
-    df_recent = df[df["Year"] >= 1990]
-
-    pivot = pd.crosstab(df_recent["Year"], df_recent["Month"])
+    # Filter to recent decades for clarity, and to attacks of known month
+    df_recent = df[(df["Year"] >= 1990) & (df["Month"] > 0)]
+
+    # Count each (year, month) cell in one pass over the year offsets
+    years = df_recent["Year"].to_numpy().astype(np.intp)
+    first_year = years.min()
+    n_years = years.max() - first_year + 1
+    cells = (years - first_year) * 12 + df_recent["Month"].to_numpy() - 1
+    counts = np.bincount(cells, minlength=n_years * 12).reshape(n_years, 12)
+    # Keep only years with attacks, as a crosstab would (GTD has no 1993)
+    has_attacks = counts.any(axis=1)
+    year_index = np.arange(first_year, first_year + n_years)[has_attacks]
+    pivot = pd.DataFrame(
+        counts[has_attacks],
+        index=pd.Index(year_index, name="Year"),
+        columns=pd.Index(range(1, 13), name="Month"),
+    )
 
     plt.figure(figsize=(14, 10))
     sns.heatmap(
@@ -244,19 +295,21 @@ def analyze_heatmap_month_year(df):
     plt.title("Terrorist Attacks Heatmap (1990-Present)")
     plt.tight_layout()
     plt.savefig("attachments/attacks_heatmap.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: attacks_heatmap.png")
 
 
 def analyze_day_patterns(df):
     """Analyzes attack patterns by day of month."""
-    # Filter out invalid days (0 means unknown)
-    df_valid = df[df["Day"] > 0]
+    # Only the Day column is needed: unknown days (0) fall into the dropped
+    # bincount slot 0, and unknown months are masked out
+    known_days = df["Day"].to_numpy()[df["Month"].to_numpy() > 0]
 
-    daily_attacks = df_valid["Day"].value_counts().sort_index()
+    days = np.arange(1, 32)
+    daily_attacks = np.bincount(known_days, minlength=32)[1:32]
 
     plt.figure(figsize=(14, 5))
-    plt.bar(daily_attacks.index, daily_attacks.values, color="steelblue", alpha=0.7)
+    plt.bar(days, daily_attacks, color="steelblue", alpha=0.7)
     plt.axhline(
         y=daily_attacks.mean(),
         color="red",
@@ -270,7 +323,7 @@ def analyze_day_patterns(df):
     plt.legend()
     plt.tight_layout()
     plt.savefig("attachments/daily_patterns.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: daily_patterns.png")
 
     # Find notable days
@@ -278,36 +331,35 @@ def analyze_day_patterns(df):
     print("NOTABLE DAYS")
     print("=" * 50)
     print(
-        f"Most attacks on day: {daily_attacks.idxmax()} ({daily_attacks.max():,} attacks)"
+        f"Most attacks on day: {days[daily_attacks.argmax()]} ({daily_attacks.max():,} attacks)"
     )
     print(
-        f"Fewest attacks on day: {daily_attacks.idxmin()} ({daily_attacks.min():,} attacks)"
+        f"Fewest attacks on day: {days[daily_attacks.argmin()]} ({daily_attacks.min():,} attacks)"
     )
 
 
-def run_analysis():
+def run_analysis(df=None):
     """Main function to run the entire analysis pipeline."""
-    df = load_data()
+    # main.py passes in the frame it has already loaded for every script
     if df is None:
-        return
+        df = load_data()
+        if df is None:
+            return
 
     # Prepare data
     df_clean = prepare_data(df)
 
-    # --- Monthly and Quarterly Analysis ---
-    analyze_monthly_patterns(df_clean)
-
-    # --- Day of the Week Analysis ---
-    analyze_day_patterns(df_clean)
-
-    # --- Seasonal Analysis (Meteorological Seasons) ---
-    analyze_seasonal_patterns(df_clean)
-
-    # --- Heatmap of Year vs. Month ---
-    analyze_heatmap_month_year(df_clean)
-
-    # --- Regional Seasonal Analysis ---
-    analyze_regional_seasonal_patterns(df_clean)
+    # --- Monthly, Daily, Seasonal, Heatmap and Regional Seasonal Analyses ---
+    # The analyses are independent, so they are rendered in worker processes
+    common.run_parallel(
+        [
+            (analyze_monthly_patterns, df_clean),
+            (analyze_day_patterns, df_clean),
+            (analyze_seasonal_patterns, df_clean),
+            (analyze_heatmap_month_year, df_clean),
+            (analyze_regional_seasonal_patterns, df_clean),
+        ]
+    )
 
     print("\nSeasonal patterns analysis complete. Plots saved to 'attachments' directory.")
 
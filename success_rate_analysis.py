@@ -4,17 +4,36 @@ Analyzes attack success rates by type, region, weapon, and terrorist group.
 """
 
 import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+import numpy as np
+
+import common
 
 # Configuration
 USE_FULL_DATASET = True
 
+# Columns used by this analysis (cleaned names)
+NEEDED_COLUMNS = [
+    "Year",
+    "Region",
+    "AttackType",
+    "Weapon_type",
+    "Group",
+    "Success",
+]
+
+# Bars are coloured by success rate, from red (0) to green (1)
+SUCCESS_CMAP = plt.get_cmap("RdYlGn")
+
 
 def load_data():
-    """Loads the terrorism data from Excel file."""
-    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.xlsx"
+    """Loads the cleaned terrorism data (renamed, numeric casualties)."""
+    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.parquet"
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_clean_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
@@ -23,39 +42,50 @@ def load_data():
 
 
 def prepare_data(df):
-    """Renames columns and prepares data for analysis."""
-    df.rename(
-        columns={
-            "iyear": "Year",
-            "imonth": "Month",
-            "iday": "Day",
-            "country_txt": "Country",
-            "region_txt": "Region",
-            "attacktype1_txt": "AttackType",
-            "target1": "Target",
-            "nkill": "Killed",
-            "nwound": "Wounded",
-            "success": "Success",
-            "gname": "Group",
-            "targtype1_txt": "Target_type",
-            "weaptype1_txt": "Weapon_type",
-        },
-        inplace=True,
-    )
+    """Returns a renamed copy of the data prepared for analysis."""
+    # Under Copy-on-Write (see common) this shares the caller's data
+    df = df.rename(columns=common.RENAME_MAP)
+    # Success is a 0/1 flag, so one byte per row is enough
+    df["Success"] = df["Success"].astype("int8")
+
+    # A no-op for frames read through common, which are categorical already
+    for col in common.CATEGORY_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype("category")
     return df
 
 
+def compute_success_stats(df, column):
+    """
+    Counts successful and total attacks and their ratio per value of a
+    categorical column, with bincounts on its codes instead of a groupby.
+    """
+    codes = df[column].cat.codes.to_numpy()
+    # Rows with a missing key are dropped, as groupby does
+    valid = codes >= 0
+    codes = np.ascontiguousarray(codes[valid], dtype=np.intp)
+    n_values = len(df[column].cat.categories)
+
+    total = np.bincount(codes, minlength=n_values)
+    successful = np.bincount(
+        codes, weights=df["Success"].to_numpy()[valid], minlength=n_values
+    )
+    stats = pd.DataFrame(
+        {"Successful": successful.astype(np.int64), "Total": total},
+        index=df[column].cat.categories.rename(column),
+    )
+    stats["Success_Rate"] = stats["Successful"] / stats["Total"]
+    # Keep only values that occur, like groupby(..., observed=True)
+    return stats[total > 0]
+
+
 def analyze_success_by_attack_type(df):
     """Analyzes success rates by attack type."""
-    success_by_type = df.groupby("AttackType").agg(
-        {"Success": ["sum", "count", "mean"]}
-    )
-    success_by_type.columns = ["Successful", "Total", "Success_Rate"]
+    success_by_type = compute_success_stats(df, "AttackType")
     success_by_type = success_by_type.sort_values("Success_Rate", ascending=False)
 
     plt.figure(figsize=(12, 6))
-    cmap = plt.get_cmap("RdYlGn")
-    colors = cmap(success_by_type["Success_Rate"])
+    colors = SUCCESS_CMAP(success_by_type["Success_Rate"].to_numpy())
     bars = plt.barh(
         success_by_type.index, success_by_type["Success_Rate"] * 100, color=colors
     )
@@ -71,7 +101,7 @@ def analyze_success_by_attack_type(df):
         )
     plt.tight_layout()
     plt.savefig("success_by_attack_type.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: success_by_attack_type.png")
 
     print("\n" + "=" * 60)
@@ -85,13 +115,11 @@ def analyze_success_by_attack_type(df):
 
 def analyze_success_by_region(df):
     """Analyzes success rates by region."""
-    success_by_region = df.groupby("Region").agg({"Success": ["sum", "count", "mean"]})
-    success_by_region.columns = ["Successful", "Total", "Success_Rate"]
+    success_by_region = compute_success_stats(df, "Region")
     success_by_region = success_by_region.sort_values("Success_Rate", ascending=False)
 
     plt.figure(figsize=(12, 6))
-    cmap = plt.get_cmap("RdYlGn")
-    colors = cmap(success_by_region["Success_Rate"])
+    colors = SUCCESS_CMAP(success_by_region["Success_Rate"].to_numpy())
     plt.barh(
         success_by_region.index, success_by_region["Success_Rate"] * 100, color=colors
     )
@@ -100,21 +128,17 @@ def analyze_success_by_region(df):
     plt.xlim(0, 100)
     plt.tight_layout()
     plt.savefig("success_by_region.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: success_by_region.png")
 
 
 def analyze_success_by_weapon(df):
     """Analyzes success rates by weapon type."""
-    success_by_weapon = df.groupby("Weapon_type").agg(
-        {"Success": ["sum", "count", "mean"]}
-    )
-    success_by_weapon.columns = ["Successful", "Total", "Success_Rate"]
+    success_by_weapon = compute_success_stats(df, "Weapon_type")
     success_by_weapon = success_by_weapon.sort_values("Success_Rate", ascending=False)
 
     plt.figure(figsize=(12, 6))
-    cmap = plt.get_cmap("RdYlGn")
-    colors = cmap(success_by_weapon["Success_Rate"])
+    colors = SUCCESS_CMAP(success_by_weapon["Success_Rate"].to_numpy())
     plt.barh(
         success_by_weapon.index, success_by_weapon["Success_Rate"] * 100, color=colors
     )
@@ -123,13 +147,24 @@ def analyze_success_by_weapon(df):
     plt.xlim(0, 100)
     plt.tight_layout()
     plt.savefig("success_by_weapon.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: success_by_weapon.png")
 
 
 def analyze_success_trends(df):
     """Analyzes how success rates have changed over time."""
-    yearly_success = df.groupby("Year")["Success"].mean() * 100
+    # Count attacks and successes per year offset in two bincount passes
+    years = df["Year"].to_numpy().astype(np.intp)
+    first_year = years.min()
+    offsets = years - first_year
+    attacks = np.bincount(offsets)
+    successes = np.bincount(offsets, weights=df["Success"].to_numpy())
+    # Keep only years with attacks, as a groupby would (GTD has no 1993)
+    has_attacks = attacks > 0
+    yearly_success = pd.Series(
+        successes[has_attacks] / attacks[has_attacks] * 100,
+        index=np.arange(first_year, first_year + len(attacks))[has_attacks],
+    )
 
     plt.figure(figsize=(14, 5))
     plt.plot(
@@ -149,56 +184,52 @@ def analyze_success_trends(df):
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.savefig("attachments/success_trends.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: success_trends.png")
 
 
 def analyze_top_groups_success(df, min_attacks=50):
     """Analyzes success rates of major terrorist groups."""
-    df_known = df[df["Group"] != "Unknown"]
-
-    group_stats = df_known.groupby("Group").agg({"Success": ["sum", "count", "mean"]})
-    group_stats.columns = ["Successful", "Total", "Success_Rate"]
+    # Drop the Unknown group from the per-group table instead of filtering rows
+    group_stats = compute_success_stats(df, "Group").drop("Unknown", errors="ignore")
     group_stats = group_stats[group_stats["Total"] >= min_attacks]
     group_stats = group_stats.nlargest(20, "Total")
     group_stats = group_stats.sort_values("Success_Rate", ascending=True)
 
     plt.figure(figsize=(12, 8))
-    cmap = plt.get_cmap("RdYlGn")
-    colors = cmap(group_stats["Success_Rate"])
+    colors = SUCCESS_CMAP(group_stats["Success_Rate"].to_numpy())
     plt.barh(group_stats.index, group_stats["Success_Rate"] * 100, color=colors)
     plt.xlabel("Success Rate (%)")
     plt.title(f"Success Rate of Major Terrorist Groups (min {min_attacks} attacks)")
     plt.xlim(0, 100)
     plt.tight_layout()
     plt.savefig("attachments/success_by_group.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: success_by_group.png")
 
 
-def run_analysis():
+def run_analysis(df=None):
     """Main function to run the entire analysis pipeline."""
-    df = load_data()
+    # main.py passes in the frame it has already loaded for every script
     if df is None:
-        return
+        df = load_data()
+        if df is None:
+            return
 
     # Prepare data
     df_clean = prepare_data(df)
 
-    # --- Analysis by Attack Type ---
-    analyze_success_by_attack_type(df_clean)
-
-    # --- Analysis by Region ---
-    analyze_success_by_region(df_clean)
-
-    # --- Analysis by Weapon Type ---
-    analyze_success_by_weapon(df_clean)
-
-    # --- Analysis by Top Terrorist Groups ---
-    analyze_top_groups_success(df_clean)
-
-    # --- Temporal Analysis of Success Rates ---
-    analyze_success_trends(df_clean)
+    # --- Attack Type, Region, Weapon, Top Group and Temporal Analyses ---
+    # The analyses are independent, so they are rendered in worker processes
+    common.run_parallel(
+        [
+            (analyze_success_by_attack_type, df_clean),
+            (analyze_success_by_region, df_clean),
+            (analyze_success_by_weapon, df_clean),
+            (analyze_top_groups_success, df_clean),
+            (analyze_success_trends, df_clean),
+        ]
+    )
 
     print("\nSuccess rate analysis complete. Plots saved to 'attachments' directory.")
 
@@ -3,19 +3,33 @@ Target Vulnerability Analysis
 Analyzes which targets are most frequently attacked and most deadly.
 """
 
-import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+import common
+
 # Configuration
 USE_FULL_DATASET = True
 
+# Columns used by this analysis (cleaned names)
+NEEDED_COLUMNS = [
+    "Year",
+    "Region",
+    "AttackType",
+    "Killed",
+    "Wounded",
+    "Target_type",
+]
+
 
 def load_data():
-    """Loads the terrorism data from Excel file."""
-    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.xlsx"
+    """Loads the cleaned terrorism data (renamed, numeric casualties)."""
+    file_path = "gtd.xlsx" if USE_FULL_DATASET else "gtd-mini.parquet"
     try:
-        df = pd.read_excel(file_path)
+        df = common.load_clean_data(file_path, columns=NEEDED_COLUMNS)
         print(f"Successfully loaded {file_path}")
         return df
     except FileNotFoundError:
@@ -23,35 +37,9 @@ def load_data():
         return None
 
 
-def prepare_data(df):
-    """Renames columns and prepares data for analysis."""
-    df.rename(
-        columns={
-            "iyear": "Year",
-            "imonth": "Month",
-            "iday": "Day",
-            "country_txt": "Country",
-            "region_txt": "Region",
-            "attacktype1_txt": "AttackType",
-            "target1": "Target",
-            "nkill": "Killed",
-            "nwound": "Wounded",
-            "gname": "Group",
-            "targtype1_txt": "Target_type",
-            "weaptype1_txt": "Weapon_type",
-        },
-        inplace=True,
-    )
-
-    df["Killed"] = pd.to_numeric(df["Killed"], errors="coerce").fillna(0)
-    df["Wounded"] = pd.to_numeric(df["Wounded"], errors="coerce").fillna(0)
-    df["Casualties"] = df["Killed"] + df["Wounded"]
-    return df
-
-
 def analyze_target_frequency(df):
     """Analyzes which targets are most frequently attacked."""
-    target_counts = df["Target_type"].value_counts()
+    target_counts = common.count_values(df["Target_type"])
 
     plt.figure(figsize=(12, 8))
     colors = sns.color_palette("Reds_r", len(target_counts))
@@ -61,7 +49,7 @@ def analyze_target_frequency(df):
     plt.gca().invert_yaxis()
     plt.tight_layout()
     plt.savefig("attachments/target_frequency.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: target_frequency.png")
 
     print("\n" + "=" * 60)
@@ -74,7 +62,7 @@ def analyze_target_frequency(df):
 
 def analyze_target_lethality(df):
     """Analyzes which targets result in most casualties."""
-    target_stats = df.groupby("Target_type").agg(
+    target_stats = df.groupby("Target_type", observed=True).agg(
         {"Killed": ["sum", "mean"], "Wounded": ["sum", "mean"], "Year": "count"}
     )
     target_stats.columns = [
@@ -119,7 +107,7 @@ def analyze_target_lethality(df):
 
     plt.tight_layout()
     plt.savefig("target_lethality.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: target_lethality.png")
 
     print("\n" + "=" * 60)
@@ -133,18 +121,14 @@ def analyze_target_lethality(df):
 
 def analyze_target_by_region(df):
     """Analyzes target preferences by region."""
-    top_regions = df["Region"].value_counts().nlargest(6).index.tolist()
-    top_targets = df["Target_type"].value_counts().nlargest(8).index.tolist()
+    top_regions = common.count_values(df["Region"]).nlargest(6).index.tolist()
+    top_targets = common.count_values(df["Target_type"]).nlargest(8).index.tolist()
 
     df_filtered = df[
-        df["Region"].isin(top_regions) & df["Target_type"].isin(top_targets)
+        common.category_mask(df["Region"], top_regions)
+        & common.category_mask(df["Target_type"], top_targets)
     ]
-    pivot = (
-        pd.crosstab(
-            df_filtered["Region"], df_filtered["Target_type"], normalize="index"
-        )
-        * 100
-    )
+    pivot = common.count_table(df_filtered, "Region", "Target_type", normalize=True)
 
     plt.figure(figsize=(14, 8))
     sns.heatmap(
@@ -152,19 +136,17 @@ def analyze_target_by_region(df):
     )
     plt.title("Target Preferences by Region (%)")
     plt.tight_layout()
-    plt.savefig("target_by_region_heatmap.png", dpi=150)
-    plt.show()
+    plt.savefig("target_by_region_heatmap.png", dpi=100)
+    plt.close()
     print("Saved: target_by_region_heatmap.png")
 
 
 def analyze_target_trends(df):
     """Analyzes how target preferences have changed over time."""
-    top_targets = df["Target_type"].value_counts().nlargest(6).index.tolist()
-    df_top = df[df["Target_type"].isin(top_targets)]
+    top_targets = common.count_values(df["Target_type"]).nlargest(6).index.tolist()
+    df_top = df[common.category_mask(df["Target_type"], top_targets)]
 
-    yearly_targets = (
-        pd.crosstab(df_top["Year"], df_top["Target_type"], normalize="index") * 100
-    )
+    yearly_targets = common.count_table(df_top, "Year", "Target_type", normalize=True)
 
     plt.figure(figsize=(14, 6))
     for target in top_targets:
@@ -180,19 +162,20 @@ def analyze_target_trends(df):
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.savefig("target_trends.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: target_trends.png")
 
 
 def analyze_attack_target_matrix(df):
     """Creates a matrix of attack types vs target types."""
-    top_attacks = df["AttackType"].value_counts().nlargest(6).index.tolist()
-    top_targets = df["Target_type"].value_counts().nlargest(8).index.tolist()
+    top_attacks = common.count_values(df["AttackType"]).nlargest(6).index.tolist()
+    top_targets = common.count_values(df["Target_type"]).nlargest(8).index.tolist()
 
     df_filtered = df[
-        df["AttackType"].isin(top_attacks) & df["Target_type"].isin(top_targets)
+        common.category_mask(df["AttackType"], top_attacks)
+        & common.category_mask(df["Target_type"], top_targets)
     ]
-    pivot = pd.crosstab(df_filtered["AttackType"], df_filtered["Target_type"])
+    pivot = common.count_table(df_filtered, "AttackType", "Target_type")
 
     plt.figure(figsize=(14, 8))
     sns.heatmap(
@@ -204,8 +187,8 @@ def analyze_attack_target_matrix(df):
     )
     plt.title("Attack Type vs Target Type Matrix")
     plt.tight_layout()
-    plt.savefig("attachments/attack_target_matrix.png", dpi=150)
-    plt.show()
+    plt.savefig("attachments/attack_target_matrix.png", dpi=100)
+    plt.close()
     print("Saved: attack_target_matrix.png")
 
 
@@ -217,7 +200,9 @@ def analyze_central_asia_targets(df):
         print("No data for Central Asia.")
         return
 
-    target_stats = ca_df.groupby("Target_type").agg({"Year": "count", "Killed": "sum"})
+    target_stats = ca_df.groupby("Target_type", observed=True).agg(
+        {"Year": "count", "Killed": "sum"}
+    )
     target_stats.columns = ["Attacks", "Killed"]
     target_stats = target_stats.sort_values("Attacks", ascending=False)
 
@@ -239,7 +224,7 @@ def analyze_central_asia_targets(df):
 
     plt.tight_layout()
     plt.savefig("attachments/central_asia_targets.png", dpi=150)
-    plt.show()
+    plt.close()
     print("Saved: central_asia_targets.png")
 
     print("\n" + "=" * 60)
@@ -248,14 +233,13 @@ def analyze_central_asia_targets(df):
     print(target_stats.to_string())
 
 
-def run_analysis():
+def run_analysis(df_clean=None):
     """Main function to run the entire analysis pipeline."""
-    df = load_data()
-    if df is None:
-        return
-
-    # Prepare data
-    df_clean = prepare_data(df)
+    # main.py passes in the frame it has already loaded for every script
+    if df_clean is None:
+        df_clean = load_data()
+        if df_clean is None:
+            return
 
     # --- Frequency Analysis ---
     print("--- Analyzing Frequency of Attacks by Target Type ---")